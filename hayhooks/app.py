@@ -1,44 +1,41 @@
+import asyncio
+import hashlib
 import os
+import sys
 import time
 import uuid
-from typing import Generator, List, Union
+from pathlib import Path
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 
+import httpx
+import orjson
 import uvicorn
 from fastapi import HTTPException, Request
-from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
 from hayhooks import BasePipelineWrapper, create_app
 from hayhooks.server.pipelines import registry
 from hayhooks.server.routers import openai as openai_module_to_patch
 from hayhooks.server.routers.openai import ChatCompletion, ChatRequest, Choice, Message, ModelObject, ModelsResponse
-from hayhooks.server.utils.mcp_utils import (
-    list_pipelines_as_tools,
-    run_pipeline_as_tool,
-)
 from hayhooks.settings import settings
 from haystack import tracing
-from haystack.lazy_imports import LazyImport
 from haystack.tracing.logging_tracer import LoggingTracer
-from letta_client import Letta
+from letta_client import AsyncLetta
 from loguru import logger as log
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from components.google.google_oauth import GoogleOAuth
 
-with LazyImport("Run 'pip install \"mcp\"' to install MCP.") as mcp_import:
-    from mcp.server import Server
-    from mcp.server.sse import SseServerTransport
-    from mcp.types import EmbeddedResource, ImageContent, TextContent, Tool
-
 ###########
 # This class adds MCP support and logging beyond what running `hayhooks run` would get us.
 
 # uvicorn_access = logging.getLogger("uvicorn.access")
 # uvicorn_access.disabled = True
 
-HAYSTACK_DETAILED_TRACING = False
+# Content tracing logs every component input and output on every pipeline run, so keep it for debugging only
+HAYSTACK_DETAILED_TRACING = os.getenv("HAYHOOKS_DETAILED_TRACING", "false").lower() == "true"
 
 if HAYSTACK_DETAILED_TRACING:
     # https://docs.haystack.deepset.ai/docs/logging
@@ -56,61 +53,183 @@ if HAYSTACK_DETAILED_TRACING:
 LETTA_BASE_URL = os.getenv("LETTA_BASE_URL", "http://letta:8283")
 LETTA_API_TOKEN = os.getenv("LETTA_API_TOKEN", "")
 
+# Open WebUI polls /models aggressively, so the agent list is cached for this many seconds
+LETTA_MODELS_TTL = float(os.getenv("LETTA_MODELS_TTL", "30"))
 
-def fetch_letta_models():
-    """Fetch available models from Letta server using the Letta client directly"""
-    try:
-        # Only pass token if it's set and non-empty, otherwise use placeholder
-        if LETTA_API_TOKEN:
-            client = Letta(base_url=LETTA_BASE_URL, api_key=LETTA_API_TOKEN, environment="local")
-        else:
-            # Letta client requires an api_key even for local development without auth
-            client = Letta(base_url=LETTA_BASE_URL, api_key=None, environment="local")
+# Streamed chunks that arrive within this window are merged into one SSE frame, set the max to 1 to send every token as it comes
+STREAM_COALESCE_MAX_CHUNKS = int(os.getenv("STREAM_COALESCE_MAX_CHUNKS", "8"))
+STREAM_COALESCE_WINDOW_MS = float(os.getenv("STREAM_COALESCE_WINDOW_MS", "5"))
+
+# Server-sent event framing around each JSON payload
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+# Stops proxies such as nginx from buffering or caching the token stream
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# OpenAI clients close the stream as soon as they see this instead of waiting for the connection to end
+_SSE_DONE = _SSE_PREFIX + b"[DONE]" + _SSE_SUFFIX
+
+# (monotonic time of last refresh, serialized /models response body)
+_models_cache: Tuple[float, Optional[bytes]] = (0.0, None)
+_models_lock = asyncio.Lock()
+# Holds a reference to the background refresh so it isn't garbage collected mid-flight
+_models_refresh_task: Optional[asyncio.Task] = None
 
-        # Get the list of agents
-        agents = client.agents.list()
 
-        # Filter out agents with names ending in "sleeptime"
-        return [{"id": agent.id, "name": agent.name} for agent in agents if not agent.name.endswith("sleeptime")]
+# /models refreshes are LETTA_MODELS_TTL apart, so keep the pooled connection alive across them
+# rather than dropping it after httpx's default 5 second keep-alive and reconnecting every time
+letta_http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=LETTA_MODELS_TTL * 2))
+
+# Only pass token if it's set and non-empty, otherwise use placeholder
+if LETTA_API_TOKEN:
+    letta_client = AsyncLetta(base_url=LETTA_BASE_URL, api_key=LETTA_API_TOKEN, environment="local", http_client=letta_http_client)
+else:
+    # Letta client requires an api_key even for local development without auth
+    letta_client = AsyncLetta(base_url=LETTA_BASE_URL, api_key=None, environment="local", http_client=letta_http_client)
+
+
+async def fetch_letta_models() -> List[ModelObject]:
+    """Fetch available models from Letta server using the async Letta client directly"""
+    try:
+        created = int(time.time())
+        letta_models = []
+        async for agent in letta_client.agents.list():
+            # Filter out agents with names ending in "sleeptime"
+            if not agent.name.endswith("sleeptime"):
+                letta_models.append(ModelObject(id=agent.id, name=agent.name, object="model", created=created, owned_by="letta"))
+        return letta_models
     except Exception as e:
         log.error(f"Unexpected error when fetching agents from Letta: {e}", exc_info=True)
         return []
 
 
-async def get_models_override():
+def _cached_models_json() -> Optional[bytes]:
+    fetched_at, models_json = _models_cache
+    if models_json is not None and time.monotonic() - fetched_at < LETTA_MODELS_TTL:
+        return models_json
+    return None
+
+
+async def refresh_models_json() -> bytes:
+    """Fetches the agent list from Letta and caches the serialized /models body, unless another refresh just did."""
+    global _models_cache
+
+    async with _models_lock:
+        # Another request may have refreshed the cache while we were waiting for the lock
+        models_json = _cached_models_json()
+        if models_json is not None:
+            return models_json
+
+        letta_models = await fetch_letta_models()
+        models_json = ModelsResponse(data=letta_models, object="list").model_dump_json().encode()
+
+        # Don't cache an empty list, Letta may still be starting up or unreachable
+        if letta_models:
+            _models_cache = (time.monotonic(), models_json)
+
+        return models_json
+
+
+async def get_models_override() -> Response:
     """
     Override of the OpenAI /models endpoint to return Letta models.
 
     This returns a list of available Letta agents as OpenAI-compatible models.
+    The serialized list is cached for LETTA_MODELS_TTL seconds.  Once it expires,
+    requests keep getting the previous list while a single background task
+    refreshes it, so only the very first request waits on Letta.
     """
-    letta_models = fetch_letta_models()
-
-    return ModelsResponse(
-        data=[
-            ModelObject(
-                id=model["id"],
-                name=model["name"],
-                object="model",
-                created=int(time.time()),
-                owned_by="letta",
-            )
-            for model in letta_models
-        ],
-        object="list",
-    )
+    global _models_refresh_task
+
+    fetched_at, models_json = _models_cache
+    if models_json is None:
+        models_json = await refresh_models_json()
+    elif time.monotonic() - fetched_at >= LETTA_MODELS_TTL and (_models_refresh_task is None or _models_refresh_task.done()):
+        _models_refresh_task = asyncio.create_task(refresh_models_json())
+
+    return Response(content=models_json, media_type="application/json")
 
 
 openai_module_to_patch.get_models = get_models_override
 
-for route_idx, route in enumerate(openai_module_to_patch.router.routes):
-    if isinstance(route, APIRoute) and route.path in ["/models", "/v1/models"]:
-        route.endpoint = get_models_override
 
+# Marks the end of the source stream in the coalescing queue
+_END_OF_STREAM = object()
+
+
+async def coalesce_chunks(chunks: AsyncIterator[str], max_chunks: int, window: float) -> AsyncGenerator[List[str], None]:
+    """
+    Groups streamed token chunks so that a fast token stream is sent as one SSE frame per batch.
+
+    A batch is flushed when it holds max_chunks chunks, or when window seconds have
+    passed since its first chunk arrived, so no chunk is held back longer than that.
+    The source is read by a separate task into a small bounded queue, so the next
+    token is already being fetched while the previous frame is written to the client.
+    """
+    if window <= 0:
+        max_chunks = 1
+    max_chunks = max(max_chunks, 1)
+
+    # Bounded so a slow client still pushes back on the source
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks * 2)
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END_OF_STREAM)
+
+    producer = asyncio.create_task(produce())
+    loop = asyncio.get_running_loop()
+    buffer: List[str] = []
+    deadline = 0.0
+    try:
+        while True:
+            if buffer:
+                # Cancelling a queue read on timeout is safe, unlike cancelling a read of the source itself
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0.0))
+                except asyncio.TimeoutError:
+                    yield buffer
+                    buffer = []
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, Exception):
+                # Send what already arrived before surfacing the error
+                if buffer:
+                    yield buffer
+                raise item
+
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(item)
+            if len(buffer) >= max_chunks:
+                yield buffer
+                buffer = []
+
+        if buffer:
+            yield buffer
+    finally:
+        producer.cancel()
+
+
+# The last letta_proxy wrapper that passed validation, so requests only re-check it after a redeploy
+_letta_proxy_wrapper: Optional[BasePipelineWrapper] = None
+
+
+def get_letta_proxy_wrapper() -> BasePipelineWrapper:
+    global _letta_proxy_wrapper
 
-async def chat_completions_override(chat_req: ChatRequest) -> Union[ChatCompletion, StreamingResponse]:
-    # Get the letta_proxy pipeline wrapper
     # Assuming 'letta_proxy' is the registered name of your pipeline
     pipeline_wrapper = registry.get("letta_proxy")
+    if pipeline_wrapper is not None and pipeline_wrapper is _letta_proxy_wrapper:
+        return pipeline_wrapper
 
     if not pipeline_wrapper:
         log.error("Pipeline 'letta_proxy' not found in registry.")
@@ -120,22 +239,41 @@ async def chat_completions_override(chat_req: ChatRequest) -> Union[ChatCompleti
         log.error(f"Retrieved 'letta_proxy' is not a BasePipelineWrapper instance. Type: {type(pipeline_wrapper)}")
         raise HTTPException(status_code=500, detail="Chat backend pipeline 'letta_proxy' is of an unexpected type.")
 
-    if not pipeline_wrapper._is_run_chat_completion_implemented:  # Now Pylance should be happier after isinstance
+    if not (pipeline_wrapper._is_run_chat_completion_implemented or pipeline_wrapper._is_run_chat_completion_async_implemented):  # Now Pylance should be happier after isinstance
         log.error(f"Pipeline 'letta_proxy' (type: {type(pipeline_wrapper)}) does not implement run_chat_completion.")
         raise HTTPException(status_code=501, detail="Chat completions endpoint not implemented for 'letta_proxy' model.")
 
-    request_body_dump = chat_req.model_dump()
+    _letta_proxy_wrapper = pipeline_wrapper
+    return pipeline_wrapper
+
+
+async def chat_completions_override(chat_req: ChatRequest) -> Union[ORJSONResponse, StreamingResponse]:
+    pipeline_wrapper = get_letta_proxy_wrapper()
+
+    # Messages are passed separately, so don't walk the whole conversation just to add agent_id
+    request_body_dump = chat_req.model_dump(exclude_none=True, exclude={"messages"})
     if "agent_id" not in request_body_dump:
         request_body_dump["agent_id"] = chat_req.model
-        log.info(f"Injected agent_id='{chat_req.model}' into request_body_dump for letta_proxy.")
+        log.info("Injected agent_id='{}' into request_body_dump for letta_proxy.", chat_req.model)
 
     try:
-        result_generator = await run_in_threadpool(
-            pipeline_wrapper.run_chat_completion,
-            model=chat_req.model,
-            messages=chat_req.messages,
-            body=request_body_dump,
-        )
+        chunks: AsyncIterator[str]
+        if pipeline_wrapper._is_run_chat_completion_async_implemented:
+            # Stream straight from the event loop, no threadpool hop per request or per token
+            chunks = await pipeline_wrapper.run_chat_completion_async(
+                model=chat_req.model,
+                messages=chat_req.messages,
+                body=request_body_dump,
+            )
+        else:
+            result_generator = await run_in_threadpool(
+                pipeline_wrapper.run_chat_completion,
+                model=chat_req.model,
+                messages=chat_req.messages,
+                body=request_body_dump,
+            )
+            # The pipeline generator is blocking, so only pull each chunk in the threadpool
+            chunks = iterate_in_threadpool(result_generator)
     except ValueError as ve:
         log.error(f"ValueError in letta_proxy.run_chat_completion: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
@@ -144,78 +282,84 @@ async def chat_completions_override(chat_req: ChatRequest) -> Union[ChatCompleti
         raise HTTPException(status_code=500, detail="Error processing chat request with letta_proxy.")
 
     resp_id = f"chatcmpl-{uuid.uuid4()}"  # OpenAI compatible ID
+    created = int(time.time())  # OpenAI uses a single timestamp for every chunk of a response
 
-    def stream_chunks() -> Generator[str, None, None]:
-        try:
-            for chunk_content in result_generator:
-                if not isinstance(chunk_content, str):
-                    log.warning(f"letta_proxy returned non-string chunk: {type(chunk_content)}. Converting to str.")
-                    chunk_content = str(chunk_content)
-
-                chunk_resp = ChatCompletion(
+    if chat_req.stream:
+        # Every token chunk shares the same envelope, so serialize it once and only encode the content per chunk
+        chunk_prefix = (
+            _SSE_PREFIX + b'{"id":' + orjson.dumps(resp_id) + b',"object":"chat.completion.chunk","created":' + orjson.dumps(created) + b',"model":' + orjson.dumps(chat_req.model) + b',"choices":[{"index":0,"delta":{"role":"assistant","content":'
+        )
+        chunk_suffix = b'},"finish_reason":null}]}' + _SSE_SUFFIX
+        final_chunk = chunk_prefix + b'""},"finish_reason":"stop"}]}' + _SSE_SUFFIX
+
+        async def stream_chunks() -> AsyncGenerator[bytes, None]:
+            try:
+                async for batch in coalesce_chunks(chunks, STREAM_COALESCE_MAX_CHUNKS, STREAM_COALESCE_WINDOW_MS / 1000):
+                    # str() hands back str chunks unchanged, so this costs nothing for well-behaved wrappers
+                    yield chunk_prefix + orjson.dumps("".join(map(str, batch))) + chunk_suffix
+
+                yield final_chunk + _SSE_DONE
+            except Exception as e:
+                log.error(f"Error during streaming from letta_proxy: {e}", exc_info=True)
+                error_chunk_content = f"Error processing stream: {e}"
+                error_resp = ChatCompletion.model_construct(
                     id=resp_id,
                     object="chat.completion.chunk",
-                    created=int(time.time()),
+                    created=created,
                     model=chat_req.model,
-                    choices=[Choice(index=0, delta=Message(role="assistant", content=chunk_content))],
+                    choices=[Choice.model_construct(index=0, delta=Message.model_construct(role="assistant", content=error_chunk_content), finish_reason="stop")],
                 )
-                yield f"data: {chunk_resp.model_dump_json()}\n\n"
+                yield _SSE_PREFIX + orjson.dumps(error_resp.model_dump()) + _SSE_SUFFIX + _SSE_DONE
 
-            final_chunk = ChatCompletion(
-                id=resp_id,
-                object="chat.completion.chunk",
-                created=int(time.time()),
-                model=chat_req.model,
-                choices=[Choice(index=0, delta=Message(role="assistant", content=""), finish_reason="stop")],
-            )
-            yield f"data: {final_chunk.model_dump_json()}\n\n"
-        except Exception as e:
-            log.error(f"Error during streaming from letta_proxy: {e}", exc_info=True)
-            error_chunk_content = f"Error processing stream: {e}"
-            error_resp = ChatCompletion(
-                id=resp_id,
-                object="chat.completion.chunk",
-                created=int(time.time()),
-                model=chat_req.model,
-                choices=[Choice(index=0, delta=Message(role="assistant", content=error_chunk_content), finish_reason="stop")],
-            )
-            yield f"data: {error_resp.model_dump_json()}\n\n"
-
-    if chat_req.stream:
-        log.info(f"Returning StreamingResponse for model {chat_req.model}")
-        return StreamingResponse(stream_chunks(), media_type="text/event-stream")
+        log.info("Returning StreamingResponse for model {}", chat_req.model)
+        return StreamingResponse(stream_chunks(), media_type="text/event-stream", headers=_SSE_HEADERS)
     else:
         # Non-streaming: collect all chunks and return a single ChatCompletion
-        log.info(f"Returning non-streaming ChatCompletion for model {chat_req.model}")
-        full_response_content = ""
+        log.info("Returning non-streaming ChatCompletion for model {}", chat_req.model)
         try:
-            for chunk_content in result_generator:
-                if not isinstance(chunk_content, str):
-                    log.warning(f"letta_proxy returned non-string chunk (non-streaming): {type(chunk_content)}. Converting to str.")
-                    chunk_content = str(chunk_content)
-                full_response_content += chunk_content
+            content_parts = [chunk_content async for chunk_content in chunks]
 
-            final_resp = ChatCompletion(
+            # Every field is built here, so skip validation both on construction and in the response model
+            final_resp = ChatCompletion.model_construct(
                 id=resp_id,
                 object="chat.completion",
-                created=int(time.time()),
+                created=created,
                 model=chat_req.model,
-                choices=[Choice(index=0, message=Message(role="assistant", content=full_response_content), finish_reason="stop")],
+                choices=[Choice.model_construct(index=0, message=Message.model_construct(role="assistant", content="".join(map(str, content_parts))), finish_reason="stop")],
             )
-            return final_resp
+            return ORJSONResponse(content=final_resp.model_dump())
         except Exception as e:
             log.error(f"Error during non-streaming from letta_proxy: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error collecting stream from letta_proxy: {e}")
 
 
-for route_idx, route in enumerate(openai_module_to_patch.router.routes):
-    if isinstance(route, APIRoute):
-        if route.path in ["/models", "/v1/models"]:
-            route.endpoint = get_models_override
-        elif route.path in ["/chat/completions", "/v1/chat/completions"] or route.operation_id == "chat_completions":  # covers /{pipeline_name}/chat
-            route.endpoint = chat_completions_override
+OPENAI_ROUTE_OVERRIDES: Dict[str, Callable[..., Any]] = {
+    "/models": get_models_override,
+    "/v1/models": get_models_override,
+    "/chat/completions": chat_completions_override,
+    "/v1/chat/completions": chat_completions_override,
+}
+
+
+def patch_openai_router() -> None:
+    """Points the OpenAI router's endpoints at the Letta overrides.
+
+    This must run before create_app() includes the router, since the app copies the routes.
+    """
+    openai_module_to_patch.router.default_response_class = ORJSONResponse
+    for route in openai_module_to_patch.router.routes:
+        if isinstance(route, APIRoute):
+            override = OPENAI_ROUTE_OVERRIDES.get(route.path)
+            if override is None and route.operation_id == "chat_completions":  # covers /{pipeline_name}/chat
+                override = chat_completions_override
+            if override is not None:
+                route.endpoint = override
+
 
+patch_openai_router()
 hayhooks = create_app()
+# Routes added from here on (Google OAuth, deployed pipelines) serialize with orjson too
+hayhooks.router.default_response_class = ORJSONResponse
 
 # Add ProxyHeadersMiddleware to handle X-Forwarded-* headers
 # This is crucial for the app to know it's behind an HTTPS proxy
@@ -224,43 +368,70 @@ hayhooks = create_app()
 hayhooks.add_middleware(ProxyHeadersMiddleware, trusted_hosts=["localhost", "127.0.0.1"])
 
 # --- MCP Server Integration ---
-mcp_import.check()
+# Set HAYHOOKS_MCP_ENABLED=false to serve only the REST and OpenAI endpoints without the MCP server
+HAYHOOKS_MCP_ENABLED = os.getenv("HAYHOOKS_MCP_ENABLED", "true").lower() == "true"
 
-# Setup the MCP server
-mcp_server: Server = Server("hayhooks-mcp-server")
 
-# Setup the SSE server transport for MCP
-mcp_sse = SseServerTransport("/messages/")
+def add_mcp_routes(app) -> None:
+    """Adds an MCP server over SSE, exposing the deployed pipelines as tools, to the app."""
+    # Imported here so deployments with MCP disabled never load the mcp package
+    try:
+        from hayhooks.server.utils.mcp_utils import list_pipelines_as_tools, run_pipeline_as_tool
+        from mcp.server import Server
+        from mcp.server.sse import SseServerTransport
+        from mcp.types import EmbeddedResource, ImageContent, TextContent, Tool
+    except ImportError as e:
+        raise ImportError("Run 'pip install \"mcp\"' to install MCP, or set HAYHOOKS_MCP_ENABLED=false.") from e
 
+    # Setup the MCP server
+    mcp_server: Server = Server("hayhooks-mcp-server")
 
-@mcp_server.list_tools()
-async def list_tools() -> List[Tool]:
-    try:
-        return await list_pipelines_as_tools()
-    except Exception as e:
-        log.error(f"Error listing MCP tools: {e}")
-        return []
+    # Setup the SSE server transport for MCP
+    mcp_sse = SseServerTransport("/messages/")
 
+    # Deployed (name, pipeline wrapper) pairs the cached tools were built from
+    tools_deployed: Optional[List[Tuple[str, object]]] = None
+    tools_cache: List[Tool] = []
 
-@mcp_server.call_tool()
-async def call_tool(name: str, arguments: dict) -> List[TextContent | ImageContent | EmbeddedResource]:
-    try:
-        return await run_pipeline_as_tool(name, arguments)
-    except Exception as e:
-        log.error(f"Error calling MCP tool '{name}': {e}")
-        # Consider returning an error structure if MCP spec allows
-        return []
+    @mcp_server.list_tools()
+    async def list_tools() -> List[Tool]:
+        nonlocal tools_deployed, tools_cache
 
+        # Tool schemas only change when pipelines are deployed or undeployed, so rebuild them only then
+        deployed = [(name, registry.get(name)) for name in registry.get_names()]
+        if tools_deployed is not None and len(tools_deployed) == len(deployed) and all(a[0] == b[0] and a[1] is b[1] for a, b in zip(tools_deployed, deployed)):
+            return tools_cache
 
-async def handle_sse(request: Request) -> Response:
-    async with mcp_sse.connect_sse(request.scope, request.receive, request._send) as streams:
-        await mcp_server.run(streams[0], streams[1], mcp_server.create_initialization_options())
-    return Response(status_code=200, media_type="text/event-stream")
+        try:
+            tools_cache = await list_pipelines_as_tools()
+        except Exception as e:
+            log.error(f"Error listing MCP tools: {e}")
+            return []
+
+        tools_deployed = deployed
+        return tools_cache
+
+    @mcp_server.call_tool()
+    async def call_tool(name: str, arguments: dict) -> List[TextContent | ImageContent | EmbeddedResource]:
+        try:
+            return await run_pipeline_as_tool(name, arguments)
+        except Exception as e:
+            log.error(f"Error calling MCP tool '{name}': {e}")
+            # Consider returning an error structure if MCP spec allows
+            return []
 
+    async def handle_sse(request: Request) -> Response:
+        async with mcp_sse.connect_sse(request.scope, request.receive, request._send) as streams:
+            await mcp_server.run(streams[0], streams[1], mcp_server.create_initialization_options())
+        return Response(status_code=200, media_type="text/event-stream")
 
-# Add MCP routes directly to the main Hayhooks app
-hayhooks.add_route("/sse", handle_sse)
-hayhooks.mount("/messages", mcp_sse.handle_post_message)
+    # Add MCP routes directly to the main Hayhooks app
+    app.add_route("/sse", handle_sse)
+    app.mount("/messages", mcp_sse.handle_post_message)
+
+
+if HAYHOOKS_MCP_ENABLED:
+    add_mcp_routes(hayhooks)
 # --- End MCP Server Integration ---
 
 # --- Google OAuth2 Integration ---
@@ -269,10 +440,17 @@ google_oauth = GoogleOAuth()
 
 hayhooks.mount("/static", StaticFiles(directory="static"), name="static")
 
+# The test page never changes while the server is running, so serve it from memory
+INDEX_HTML = Path("static/index.html").read_bytes()
+INDEX_HTML_ETAG = f'"{hashlib.md5(INDEX_HTML, usedforsecurity=False).hexdigest()}"'
+
 
 @hayhooks.get("/", response_class=HTMLResponse)
-async def test_page():
-    return FileResponse("static/index.html")
+async def test_page(request: Request):
+    headers = {"ETag": INDEX_HTML_ETAG, "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == INDEX_HTML_ETAG:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=INDEX_HTML, headers=headers)
 
 
 @hayhooks.get("/google-auth-initiate")
@@ -282,7 +460,7 @@ async def google_auth_initiate(user_id: str):
     Returns the authorization URL that the user should visit to grant permissions.
     """
     try:
-        authorization_url, state = google_oauth.create_authorization_url(user_id)
+        authorization_url, state = await run_in_threadpool(google_oauth.create_authorization_url, user_id)
         return {"authorization_url": authorization_url, "state": state}
     except Exception as e:
         log.error(f"Error initiating Google OAuth: {e}")
@@ -294,9 +472,10 @@ async def google_auth_callback(request: Request):
     """
     Handles the callback from Google after user authorization.
     """
-    log.debug(f"Callback received: {request.url}")
-    log.debug(f"Query params: {dict(request.query_params)}")
-    log.debug(f"Headers: {dict(request.headers)}")
+    # Only copy the query params and headers when DEBUG logging is actually enabled
+    log.debug("Callback received: {}", request.url)
+    log.opt(lazy=True).debug("Query params: {}", lambda: dict(request.query_params))
+    log.opt(lazy=True).debug("Headers: {}", lambda: dict(request.headers))
 
     try:
         # Get the full URL including query parameters
@@ -306,7 +485,8 @@ async def google_auth_callback(request: Request):
         if not state:
             raise HTTPException(status_code=400, detail="Missing state parameter")
 
-        google_oauth.handle_callback(authorization_response, state)
+        # The token exchange and credential write are blocking, so keep them off the event loop
+        await run_in_threadpool(google_oauth.handle_callback, authorization_response, state)
 
         log.info("Successful callback!")
 
@@ -353,7 +533,7 @@ async def check_google_auth(user_id: str):
     Checks if a user is authenticated with Google.
     """
     try:
-        is_authenticated = google_oauth.check_auth_status(user_id)
+        is_authenticated = await run_in_threadpool(google_oauth.check_auth_status, user_id)
         return {"authenticated": is_authenticated, "user_id": user_id}
     except Exception as e:
         log.error(f"Error checking Google auth status: {e}")
@@ -363,5 +543,15 @@ async def check_google_auth(user_id: str):
 # --- End Google OAuth2 Integration ---
 
 if __name__ == "__main__":
-    # Run the combined Hayhooks + MCP server
-    uvicorn.run("app:hayhooks", host=settings.host, port=settings.port)
+    # Run the combined Hayhooks + MCP server.
+    # uvloop and httptools come in with uvicorn[standard], but uvloop isn't built for Windows.
+    # MCP SSE sessions and Google OAuth state live in process memory, so only raise
+    # WEB_CONCURRENCY behind a proxy with sticky sessions.
+    uvicorn.run(
+        "app:hayhooks",
+        host=settings.host,
+        port=settings.port,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
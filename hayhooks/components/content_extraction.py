@@ -1,18 +1,21 @@
+import functools
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
+import pypdfium2
 from hayhooks import log as logger
 from haystack import Document, Pipeline, SuperComponent, component
 from haystack.components.converters import (
     CSVToDocument,
     HTMLToDocument,
     MarkdownToDocument,
-    PyPDFToDocument,
     TextFileToDocument,
 )
-from haystack.components.joiners import DocumentJoiner
 from haystack.components.preprocessors import DocumentCleaner
-from haystack.components.routers import FileTypeRouter
 from haystack.dataclasses import ByteStream
 from haystack.utils import Secret
 
@@ -24,6 +27,9 @@ from components.stackoverflow import StackOverflowContentResolver
 from components.youtube_transcript import YouTubeTranscriptResolver
 from components.zotero import ZoteroContentResolver
 
+# PDFium is not thread safe, even across separate documents, so every pypdfium2 call goes through this lock
+_pdfium_lock = threading.Lock()
+
 
 @component
 class URLContentRouter:
@@ -38,6 +44,9 @@ class URLContentRouter:
         self.resolvers = resolvers
         # The last resolver should be the generic one that can handle any URL
         self.generic_resolver = resolvers[-1]
+        # Resolvers can declare the hosts they handle in a `domains` attribute.  Most URLs belong to none of
+        # them, so remember which resolvers are worth asking about each host instead of asking all of them.
+        self._resolvers_for_host = functools.lru_cache(maxsize=1024)(self._find_host_resolvers)
 
     @component.output_types(streams=List[ByteStream])
     def run(self, urls: List[str]):
@@ -49,28 +58,26 @@ class URLContentRouter:
         Returns:
             Dict[str, List[ByteStream]]: A dictionary with a "streams" key containing a list of ByteStream objects.
         """
-        # Group URLs by resolver
-        resolver_urls: Dict[Any, List[str]] = {}
+        # Search results often repeat a URL; fetch each one once.  JoinWithContent matches content
+        # back to every scored document by URL, so the duplicates don't need their own streams.
+        unique_urls = list(dict.fromkeys(urls))
+        if len(unique_urls) < len(urls):
+            logger.debug(f"Skipping {len(urls) - len(unique_urls)} duplicate URLs")
 
-        for url in urls:
-            resolver = self._find_resolver(url)
-            if resolver not in resolver_urls:
-                resolver_urls[resolver] = []
-            resolver_urls[resolver].append(url)
+        # Group URLs by resolver
+        resolver_urls: Dict[Any, List[str]] = defaultdict(list)
+        for url in unique_urls:
+            resolver_urls[self._find_resolver(url)].append(url)
 
-        # Fetch content using each resolver
-        all_streams = []
+        # Fetch content using each resolver.  The resolvers work on disjoint URLs and spend their time
+        # waiting on different services, so run them side by side when there's more than one.
+        if len(resolver_urls) <= 1:
+            results = [self._run_resolver(resolver, resolver_urls[resolver]) for resolver in resolver_urls]
+        else:
+            with ThreadPoolExecutor(max_workers=len(resolver_urls), thread_name_prefix="url-resolver") as executor:
+                results = list(executor.map(self._run_resolver, resolver_urls.keys(), resolver_urls.values()))
 
-        for resolver, urls in resolver_urls.items():
-            try:
-                result = resolver.run(urls)
-                if "streams" in result:
-                    streams = result["streams"]
-                    all_streams.extend(streams)
-                else:
-                    logger.debug(f"No streams found for {resolver}")
-            except Exception:
-                logger.exception(f"Exception in {resolver} run with {urls}")
+        all_streams = [stream for streams in results for stream in streams]
 
         # If no streams were successfully fetched, create an empty placeholder stream
         # to prevent pipeline blocking. This allows the pipeline to complete gracefully
@@ -90,6 +97,17 @@ class URLContentRouter:
 
         return {"streams": all_streams}
 
+    def _run_resolver(self, resolver: Any, urls: List[str]) -> List[ByteStream]:
+        """Fetch content for the URLs with the given resolver, logging rather than raising failures."""
+        try:
+            result = resolver.run(urls)
+            if "streams" in result:
+                return result["streams"]
+            logger.debug(f"No streams found for {resolver}")
+        except Exception:
+            logger.exception(f"Exception in {resolver} run with {urls}")
+        return []
+
     def _find_resolver(self, url: str) -> Any:
         """Find the appropriate resolver for the given URL.
 
@@ -99,43 +117,213 @@ class URLContentRouter:
         Returns:
             Any: The resolver that can handle the URL.
         """
-        for resolver in self.resolvers:
+        try:
+            host = (urlsplit(url).hostname or "").lower()
+        except ValueError:
+            host = ""
+
+        for resolver in self._resolvers_for_host(host):
             if resolver.can_handle(url):
                 return resolver
 
         # This should never happen since the generic resolver can handle any URL
         return self.generic_resolver
 
+    def _find_host_resolvers(self, host: str) -> Tuple[Any, ...]:
+        """Find the resolvers that may handle URLs on the given host, in order.
+
+        A resolver can declare a `domains` class attribute, a tuple of the hosts it handles.  A host
+        matches a domain when it is the domain or one of its subdomains, and a resolver is only asked
+        (through can_handle) about URLs on a matching host.  Resolvers without `domains` are always
+        included, as are all resolvers when the host is unknown (for example a URL without a scheme).
+        """
+        resolvers = []
+        for resolver in self.resolvers:
+            domains = getattr(resolver, "domains", None)
+            if not host or domains is None or any(host == domain or host.endswith("." + domain) for domain in domains):
+                resolvers.append(resolver)
+        return tuple(resolvers)
+
+
+# Shared by every MimeTypeConverter, PDF and HTML conversion is CPU heavy so there's no point in more threads than cores
+_CONVERSION_WORKERS = os.cpu_count() or 1
+_conversion_executor = ThreadPoolExecutor(max_workers=_CONVERSION_WORKERS, thread_name_prefix="content-conversion")
+
+
+# Content-Types that say nothing about the content
+_GENERIC_MIME_TYPES = frozenset(["", "application/octet-stream", "binary/octet-stream", "application/download", "application/x-download"])
+
+
+def _sniff_mime_type(data: bytes) -> Optional[str]:
+    """Returns the MIME type given away by the first bytes of the content, if any."""
+    if not data:
+        return None
+    if data.startswith(b"%PDF-"):
+        return "application/pdf"
+    head = data[:64].lstrip().lower()
+    if head.startswith((b"<!doctype html", b"<html")):
+        return "text/html"
+    return None
+
+
+def _split_batches(items: List[Any], count: int) -> List[List[Any]]:
+    """Splits items into at most count contiguous batches of near equal size."""
+    size, remainder = divmod(len(items), count)
+    batches = []
+    start = 0
+    for i in range(min(count, len(items))):
+        end = start + size + (1 if i < remainder else 0)
+        batches.append(items[start:end])
+        start = end
+    return batches
+
+
+@component
+class MimeTypeConverter:
+    """A component that converts streams to documents with the converter registered for their MIME type.
+
+    This replaces a FileTypeRouter feeding one converter node per type and a DocumentJoiner.  Streams
+    are grouped by converter and the groups are converted concurrently, so a large PDF doesn't hold
+    up the HTML pages fetched alongside it.  The group for a converter that is safe to run on several
+    threads at once is also split into batches across the workers, since a page of search results is
+    usually all HTML.
+    """
+
+    def __init__(
+        self,
+        converters: Dict[str, Any],
+        fallback_converter: Any,
+        cleaner: Optional[Any] = None,
+        uncleaned_mime_types: Optional[List[str]] = None,
+        split_mime_types: Optional[List[str]] = None,
+    ):
+        """Initialize the converter.
+
+        Args:
+            converters (Dict[str, Any]): Converter to use for each MIME type.  Several types can share one converter.
+            fallback_converter (Any): Converter for streams with a missing or unsupported MIME type.
+            cleaner (Optional[Any]): Cleaner, such as a DocumentCleaner, run on the converted documents.
+            uncleaned_mime_types (Optional[List[str]]): MIME types whose converters already produce clean text and skip the cleaner.
+            split_mime_types (Optional[List[str]]): MIME types whose converters are thread safe, so their streams can be split into batches converted in parallel.
+        """
+        self.converters = converters
+        self.fallback_converter = fallback_converter
+        self.cleaner = cleaner
+        self._uncleaned_converters = {converters[mime_type] for mime_type in uncleaned_mime_types or [] if mime_type in converters}
+        self._split_converters = {converters[mime_type] for mime_type in split_mime_types or [] if mime_type in converters}
+
+    @component.output_types(documents=List[Document])
+    def run(self, sources: List[ByteStream]):
+        """Convert the streams into documents.
+
+        Args:
+            sources (List[ByteStream]): The streams to convert.
+
+        Returns:
+            Dict[str, List[Document]]: A dictionary with a "documents" key containing the converted documents.
+        """
+        groups: Dict[Any, List[ByteStream]] = {}
+        for source in sources:
+            groups.setdefault(self._find_converter(source), []).append(source)
+
+        jobs: List[Tuple[Any, List[ByteStream]]] = []
+        for converter, streams in groups.items():
+            if converter in self._split_converters:
+                jobs.extend((converter, batch) for batch in _split_batches(streams, _CONVERSION_WORKERS))
+            else:
+                jobs.append((converter, streams))
+        if len(jobs) == 1:
+            ((converter, streams),) = jobs
+            return {"documents": self._convert(converter, streams)}
+
+        futures = [_conversion_executor.submit(self._convert, converter, streams) for converter, streams in jobs]
+        documents: List[Document] = []
+        for future in futures:
+            documents.extend(future.result())
+        return {"documents": documents}
+
+    def _convert(self, converter: Any, streams: List[ByteStream]) -> List[Document]:
+        documents = converter.run(sources=streams)["documents"]
+        if self.cleaner is None or converter in self._uncleaned_converters or not documents:
+            return documents
+        return self.cleaner.run(documents=documents)["documents"]
+
+    def _find_converter(self, source: ByteStream) -> Any:
+        # Content-Type headers may carry parameters such as "; charset=utf-8"
+        mime_type = (source.mime_type or "").split(";", 1)[0].strip().lower()
+        # Servers often mislabel PDFs, and label what they don't know as octet-stream, so check the bytes
+        sniffed = _sniff_mime_type(source.data)
+        if sniffed == "application/pdf" or (sniffed and mime_type in _GENERIC_MIME_TYPES):
+            mime_type = sniffed
+        return self.converters.get(mime_type, self.fallback_converter)
+
+
+@component
+class PdfiumToDocument:
+    """A component that converts PDFs to documents with pypdfium2.
+
+    PDFium extracts text in native code rather than pure Python like pypdf, and pages are
+    released as soon as their text is read so a large PDF is never held in memory as page
+    objects all at once.  Used in place of haystack's PyPDFToDocument.
+    """
+
+    @component.output_types(documents=List[Document])
+    def run(self, sources: List[ByteStream]):
+        """Convert the PDF streams into documents.
+
+        Args:
+            sources (List[ByteStream]): The PDF streams to convert.
+
+        Returns:
+            Dict[str, List[Document]]: A dictionary with a "documents" key containing the converted documents.
+        """
+        documents = []
+        for source in sources:
+            try:
+                content = self._extract_text(source.data)
+            except Exception as e:
+                logger.warning(f"Could not read PDF from {source.meta.get('url')}: {e}")
+                continue
+            documents.append(Document(content=content, meta=dict(source.meta)))
+        return {"documents": documents}
+
+    @staticmethod
+    def _extract_text(data: bytes) -> str:
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(data)
+            try:
+                pages = []
+                for page in pdf:
+                    text_page = page.get_textpage()
+                    pages.append(text_page.get_text_range())
+                    text_page.close()
+                    page.close()
+                # Separate pages with form feeds like PyPDFToDocument does
+                return "\f".join(pages)
+            finally:
+                pdf.close()
+
+
+def _get_url(meta: Dict[str, Any]) -> Optional[str]:
+    """Returns the URL from document meta, which search components store under either "url" or "link"."""
+    if "url" in meta:
+        return meta["url"]
+    return meta.get("link")
+
 
 @component
 class ExtractUrls:
     @component.output_types(urls=list[str])
     def run(self, documents: list[Document]):
-        urls = []
-        for doc in documents:
-            # Check for both "url" and "link" keys in the document meta
-            if "url" in doc.meta:
-                urls.append(doc.meta["url"])
-            elif "link" in doc.meta:
-                urls.append(doc.meta["link"])
-        return {"urls": urls}
+        return {"urls": [_get_url(doc.meta) for doc in documents if "url" in doc.meta or "link" in doc.meta]}
 
 
 @component
 class JoinWithContent:
     @component.output_types(documents=list[Document])
     def run(self, scored_documents: list[Document], content_documents: list[Document]):
-        joined_documents = []
         extracted_content: dict[str, str] = {}
 
-        # Helper function to get URL from document meta
-        def get_url(doc):
-            if "url" in doc.meta:
-                return doc.meta["url"]
-            elif "link" in doc.meta:
-                return doc.meta["link"]
-            return None
-
         # If the content extraction produced invalid documents, skip them and
         # use the original scored ones.
         for content_doc in content_documents:
@@ -148,35 +336,27 @@ class JoinWithContent:
                 logger.warning(f"Empty content found in {content_doc}, skipping")
                 continue
 
-            url = get_url(content_doc)
+            url = _get_url(content_doc.meta)
             if url is None:
                 logger.warning(f"No url found in {content_doc}, skipping")
                 continue
 
             extracted_content[url] = content
 
-        for scored_document in scored_documents:
-            url = get_url(scored_document)
-            if not url:
-                continue  # Skip documents without URL or link
-
-            score = scored_document.score
-            logger.debug(f"run: processing document {url} with score {score}")
-
-            if url in extracted_content:
-                content = extracted_content[url]
-            else:
-                content = scored_document.content
-
-            doc = Document.from_dict(
+        # Documents without URL or link are skipped
+        joined_documents = [
+            Document.from_dict(
                 {
                     "title": scored_document.meta.get("title", "Untitled"),
-                    "content": content,
+                    "content": extracted_content.get(url, scored_document.content),
                     "url": url,
-                    "score": score,
+                    "score": scored_document.score,
                 }
             )
-            joined_documents.append(doc)
+            for scored_document in scored_documents
+            if (url := _get_url(scored_document.meta))
+        ]
+        logger.debug(f"run: joined {len(joined_documents)} of {len(scored_documents)} scored documents, {len(extracted_content)} with extracted content")
         return {"documents": joined_documents}
 
 
@@ -185,7 +365,7 @@ def build_search_extraction_component(
     user_agents: Optional[list[str]] = None,
     retry_attempts: int = 2,
     timeout: int = 3,
-    http2: bool = False,
+    http2: bool = True,
 ) -> SuperComponent:
     """Fetches URLs from a list of documents and extract the contents of the pages"""
 
@@ -200,7 +380,6 @@ def build_search_extraction_component(
     pipe.add_component("content_extractor", content_extraction_component)
     pipe.add_component("content_joiner", content_joiner)
 
-    # OutputAdapter always has dict with "output" as the key
     pipe.connect("extract_urls_adapter.urls", "content_extractor.urls")
     pipe.connect("content_extractor.documents", "content_joiner.content_documents")
 
@@ -212,26 +391,15 @@ def build_search_extraction_component(
     return extraction_component
 
 
-def build_content_extraction_component(
-    raise_on_failure: bool = True,
-    user_agents: Optional[list[str]] = None,
-    retry_attempts: int = 2,
-    timeout: int = 3,
-    http2: bool = False,
-) -> SuperComponent:
-    """Builds a Haystack SuperComponent responsible for fetching content from URLs,
-    determining file types, converting them to Documents, joining them,
-    and cleaning them.
-
-    Returns:
-        A SuperComponent ready to be added to a pipeline.
-        Input: urls (List[str])
-        Output: documents (List[Document])
+@functools.lru_cache(maxsize=None)
+def build_url_resolvers(raise_on_failure: bool = True, timeout: int = 3, http2: bool = True) -> Tuple[Any, ...]:
+    """Builds the URL content resolvers, generic resolver last.
 
+    The extract, excerpt and search pipelines each build their own extraction component,
+    and a SuperComponent can only belong to one pipeline.  The resolvers aren't pipeline
+    components, and creating them is the expensive part (the Zotero resolver syncs the
+    whole library), so they are built once per configuration and shared.
     """
-    preprocessing_pipeline = Pipeline()
-
-    # Create resolvers
     stackoverflow_resolver = StackOverflowContentResolver(
         raise_on_failure=raise_on_failure,
         timeout=timeout,
@@ -273,91 +441,75 @@ def build_content_extraction_component(
     )
 
     # Content fetcher resolver as fallback, this just handles generic URLs
-    content_fetcher_resolver = ContentFetcherResolver(raise_on_failure=raise_on_failure)
+    content_fetcher_resolver = ContentFetcherResolver(raise_on_failure=raise_on_failure, http2=http2)
+
+    return (
+        stackoverflow_resolver,
+        zotero_resolver,
+        youtube_resolver,
+        notion_resolver,
+        github_issue_resolver,
+        github_pr_resolver,
+        github_repo_resolver,
+        content_fetcher_resolver,  # Must be last
+    )
+
+
+def build_content_extraction_component(
+    raise_on_failure: bool = True,
+    user_agents: Optional[list[str]] = None,
+    retry_attempts: int = 2,
+    timeout: int = 3,
+    http2: bool = True,
+) -> SuperComponent:
+    """Builds a Haystack SuperComponent responsible for fetching content from URLs,
+    determining file types, converting them to Documents, joining them,
+    and cleaning them.
+
+    Returns:
+        A SuperComponent ready to be added to a pipeline.
+        Input: urls (List[str])
+        Output: documents (List[Document])
+
+    """
+    preprocessing_pipeline = Pipeline()
 
     # Create router with all resolvers (generic resolver must be last)
-    url_router = URLContentRouter(
-        resolvers=[
-            stackoverflow_resolver,
-            zotero_resolver,
-            youtube_resolver,
-            notion_resolver,
-            github_issue_resolver,
-            github_pr_resolver,
-            github_repo_resolver,
-            content_fetcher_resolver,  # Must be last
-        ]
-    )
+    url_router = URLContentRouter(resolvers=list(build_url_resolvers(raise_on_failure=raise_on_failure, timeout=timeout, http2=http2)))
 
-    document_cleaner = DocumentCleaner()
-
-    # Define supported MIME types and any custom mappings
-    mime_types = [
-        "text/plain",
-        "text/html",
-        "text/csv",
-        "text/markdown",
-        "text/mdx",  # Letta uses this sometimes
-        "application/pdf",
-        # Add other types like docx if needed later
-        # "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    ]
-    additional_mimetypes = {"text/mdx": ".mdx"}
-
-    # This should use MultiFileConverter
-    file_type_router = FileTypeRouter(mime_types=mime_types, additional_mimetypes=additional_mimetypes)
-    text_file_converter = TextFileToDocument()
-    html_converter = HTMLToDocument()
+    # One converter for both markdown types, so their streams are converted in a single batch
     markdown_converter = MarkdownToDocument()
-    mdx_converter = MarkdownToDocument()  # Treat mdx as markdown
-    pdf_converter = PyPDFToDocument()
-    csv_converter = CSVToDocument()
-    # docx_converter = DOCXToDocument() # If needed later
-    document_joiner = DocumentJoiner()
-
-    # Should add warnings to this so it doesn't just fall through
-    unclassified_file_converter = TextFileToDocument()
+    mime_type_converter = MimeTypeConverter(
+        converters={
+            "text/plain": TextFileToDocument(),
+            # trafilatura's fast mode skips its backup extractors (readability, jusText), which roughly halves the work per page
+            "text/html": HTMLToDocument(extraction_kwargs={"fast": True}),
+            "text/csv": CSVToDocument(),
+            "text/markdown": markdown_converter,
+            "text/mdx": markdown_converter,  # Letta uses this sometimes, treat mdx as markdown
+            "application/pdf": PdfiumToDocument(),
+            # Add other types like docx if needed later
+            # "application/vnd.openxmlformats-officedocument.wordprocessingml.document": DOCXToDocument(),
+        },
+        # Should add warnings to this so it doesn't just fall through
+        fallback_converter=TextFileToDocument(),
+        # Only markup needs cleaning, plain text, CSV and PDF text come out of their converters clean
+        cleaner=DocumentCleaner(),
+        uncleaned_mime_types=["text/plain", "text/csv", "application/pdf"],
+        # Safe to split across threads (see test_split_converters_are_thread_safe); PDFium serialises on a global lock, so a PDF batch is kept whole
+        split_mime_types=["text/plain", "text/html", "text/markdown", "text/mdx"],
+    )
 
     # Add components to the internal pipeline
     preprocessing_pipeline.add_component(instance=url_router, name="url_router")
-    preprocessing_pipeline.add_component(instance=file_type_router, name="file_type_router")
-    preprocessing_pipeline.add_component(instance=unclassified_file_converter, name="unclassified_file_converter")
-    preprocessing_pipeline.add_component(instance=text_file_converter, name="text_file_converter")
-    preprocessing_pipeline.add_component(instance=markdown_converter, name="markdown_converter")
-    preprocessing_pipeline.add_component(instance=html_converter, name="html_converter")
-    preprocessing_pipeline.add_component(instance=pdf_converter, name="pypdf_converter")
-    preprocessing_pipeline.add_component(instance=csv_converter, name="csv_converter")
-    # preprocessing_pipeline.add_component(instance=docx_converter, name="docx_converter") # If needed later
-    preprocessing_pipeline.add_component(instance=mdx_converter, name="mdx_converter")
-    preprocessing_pipeline.add_component(instance=document_joiner, name="document_joiner")
-    preprocessing_pipeline.add_component(instance=document_cleaner, name="document_cleaner")
+    preprocessing_pipeline.add_component(instance=mime_type_converter, name="mime_type_converter")
 
     # Connect the components
-    preprocessing_pipeline.connect("url_router.streams", "file_type_router.sources")
-
-    preprocessing_pipeline.connect("file_type_router.text/plain", "text_file_converter.sources")
-    preprocessing_pipeline.connect("file_type_router.text/html", "html_converter.sources")
-    preprocessing_pipeline.connect("file_type_router.text/csv", "csv_converter.sources")
-    preprocessing_pipeline.connect("file_type_router.application/pdf", "pypdf_converter.sources")
-    preprocessing_pipeline.connect("file_type_router.text/markdown", "markdown_converter.sources")
-    preprocessing_pipeline.connect("file_type_router.text/mdx", "mdx_converter.sources")  # Route mdx to markdown converter
-    preprocessing_pipeline.connect("file_type_router.unclassified", "unclassified_file_converter.sources")  # Route unclassified to text converter as fallback
-    # preprocessing_pipeline.connect("file_type_router.application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx_converter.sources") # If needed later
-
-    preprocessing_pipeline.connect("unclassified_file_converter", "document_joiner")
-    preprocessing_pipeline.connect("text_file_converter", "document_joiner")
-    preprocessing_pipeline.connect("html_converter", "document_joiner")
-    preprocessing_pipeline.connect("csv_converter", "document_joiner")
-    preprocessing_pipeline.connect("pypdf_converter", "document_joiner")
-    preprocessing_pipeline.connect("markdown_converter", "document_joiner")
-    preprocessing_pipeline.connect("mdx_converter", "document_joiner")
-    # preprocessing_pipeline.connect("docx_converter", "document_joiner") # If needed later
-
-    preprocessing_pipeline.connect("document_joiner", "document_cleaner")
+    preprocessing_pipeline.connect("url_router.streams", "mime_type_converter.sources")
 
     extraction_component = SuperComponent(
         pipeline=preprocessing_pipeline,
         input_mapping={"urls": ["url_router.urls"]},
-        output_mapping={"document_cleaner.documents": "documents"},
+        output_mapping={"mime_type_converter.documents": "documents"},
     )
     return extraction_component
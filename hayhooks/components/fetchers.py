@@ -1,4 +1,10 @@
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
 from hayhooks import log as logger
@@ -8,6 +14,79 @@ from haystack.dataclasses import ByteStream
 from haystack.utils import Secret
 from scrapling.fetchers import Fetcher
 
+# Seconds to wait before each retry of a failed fetch, the last repeating for any further attempts
+_RETRY_BACKOFFS = (2, 4, 8, 10)
+
+
+class _StreamCache:
+    """A thread safe LRU cache of fetched streams by URL, whose entries expire after a TTL."""
+
+    def __init__(self, ttl: float, size: int):
+        """Initialize the cache.
+
+        Args:
+            ttl (float): How long a stream is reused for the same URL, in seconds. 0 disables the cache.
+            size (int): The maximum number of URLs kept in the cache.
+        """
+        self.ttl = ttl
+        self.size = size
+        # url -> (expiry, data, meta, mime_type), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Dict[str, Any], Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[ByteStream]:
+        """Return a new stream with the cached content for a URL, if it hasn't expired."""
+        if self.ttl <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            expiry, data, meta, mime_type = entry
+            if expiry < time.monotonic():
+                del self._entries[url]
+                return None
+            self._entries.move_to_end(url)
+
+        # Streams and their metadata are mutable, so never hand out the cached objects themselves
+        return ByteStream(data=data, meta=dict(meta), mime_type=mime_type)
+
+    def put(self, url: str, stream: ByteStream) -> None:
+        """Cache a fetched stream for a URL, evicting the least recently used URLs when full."""
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[url] = (time.monotonic() + self.ttl, stream.data, dict(stream.meta), stream.mime_type)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+def _url_origin(url: str) -> str:
+    """Returns the scheme and host of a URL, or an empty string if it can't be parsed."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return ""
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+def _with_requested_url(stream: ByteStream, url: str) -> ByteStream:
+    """Returns the stream with meta["url"] set to the URL that was requested, keeping any other URL the fetcher reported as "final_url".
+
+    JoinWithContent matches content back to search results by this URL.
+    """
+    if stream.meta.get("url") == url:
+        return stream
+    return ByteStream(data=stream.data, meta={**stream.meta, "url": url, "final_url": stream.meta.get("url")}, mime_type=stream.mime_type)
+
+
+def _retry_backoff(attempt: int) -> float:
+    """Returns the backoff before the given retry attempt, with jitter so concurrent retries don't hit the service together."""
+    return _RETRY_BACKOFFS[min(attempt, len(_RETRY_BACKOFFS)) - 1] + random.uniform(0, 0.5)
+
 
 @component
 class ContentFetcherResolver:
@@ -21,6 +100,7 @@ class ContentFetcherResolver:
         fetcher_configs: Optional[List[Dict[str, Any]]] = None,
         default_fetcher: str = "default",
         raise_on_failure: bool = False,
+        http2: bool = True,
     ):
         """Initialize the ContentFetcherRouter.
 
@@ -28,9 +108,11 @@ class ContentFetcherResolver:
             fetcher_configs (Optional[List[Dict[str, Any]]]): List of fetcher configurations with patterns and preferences
             default_fetcher (str): Default fetcher to use when no patterns match
             raise_on_failure (bool): Whether to raise exceptions on fetcher failures
+            http2 (bool): Whether the default fetcher uses HTTP/2, multiplexing requests to the same host over one connection
         """
         self.raise_on_failure = raise_on_failure
         self.default_fetcher = default_fetcher
+        self.http2 = http2
 
         # Default configuration
         if fetcher_configs is None:
@@ -60,8 +142,9 @@ class ContentFetcherResolver:
         # Initialize Jina fetcher
         self.fetchers["jina"] = JinaLinkContentFetcher()
 
-        # Initialize default fetcher
-        self.fetchers["default"] = HaystackLinkContentFetcher()
+        # Initialize default fetcher.  This resolver is shared by the extraction pipelines, so its
+        # HTTP/2 connection pool is reused across requests and multiplexes URLs on the same host.
+        self.fetchers["default"] = HaystackLinkContentFetcher(http2=self.http2)
 
     def _match_url_pattern(self, url: str, pattern: str) -> bool:
         """Check if URL matches a given pattern."""
@@ -132,20 +215,77 @@ class ContentFetcherResolver:
         Returns:
             Dict[str, List[ByteStream]]: Dictionary with "streams" key containing fetched content.
         """
+        # Hand each primary fetcher all of its URLs in one call so it can fetch them concurrently,
+        # then send only the URLs it failed on through the fallback fetchers.
+        primary_fetchers = {url: self._select_fetcher(url) for url in urls}
+        primary_urls: Dict[str, List[str]] = {}
+        for url, fetcher_name in primary_fetchers.items():
+            primary_urls.setdefault(fetcher_name, []).append(url)
+
+        fetched: Dict[str, ByteStream] = {}
+        for fetcher_name, fetcher_urls in primary_urls.items():
+            fetched.update(self._fetch_urls(fetcher_name, fetcher_urls))
+
         all_streams = []
 
         for url in urls:
-            stream = self._fetch_url_with_fallbacks(url)
+            stream = fetched.get(url)
+            if stream is None:
+                stream = self._fetch_url_with_fallbacks(url, self._get_fallback_fetchers(primary_fetchers[url]))
             if stream:
                 all_streams.append(stream)
 
         return {"streams": all_streams}
 
-    def _fetch_url_with_fallbacks(self, url: str) -> Optional[ByteStream]:
-        """Fetch a single URL with fallback handling."""
-        primary_fetcher = self._select_fetcher(url)
-        fetchers_to_try = [primary_fetcher] + self._get_fallback_fetchers(primary_fetcher)
+    def _fetch_urls(self, fetcher_name: str, urls: List[str]) -> Dict[str, ByteStream]:
+        """Fetch several URLs with one fetcher, returning the streams that have content keyed by URL."""
+        fetcher = self.fetchers.get(fetcher_name)
+        if not fetcher:
+            return {}
+
+        try:
+            logger.debug(f"Trying fetcher {fetcher_name} for URLs {urls}")
+            streams = fetcher.run(urls).get("streams", [])
+        except Exception as e:
+            logger.exception(f"Fetcher {fetcher_name} failed for {urls}: {str(e)}")
+
+            # Mark fetcher as unavailable if it has this capability
+            if hasattr(fetcher, "_available"):
+                fetcher._available = False
+            return {}
+
+        # Match streams to the requested URLs by their meta URL.  A fetcher may report the final URL after
+        # a redirect instead, so a lone leftover stream belongs to the lone missing URL, and when several are
+        # left over the missing URLs are fetched one at a time, where every stream belongs to the one URL.
+        requested = set(urls)
+        fetched: Dict[str, ByteStream] = {}
+        leftovers = []
+        for stream in streams:
+            if not stream.data:
+                continue
+            stream_url = stream.meta.get("url")
+            if stream_url in requested and stream_url not in fetched:
+                fetched[stream_url] = stream
+            else:
+                leftovers.append(stream)
 
+        missing = [url for url in urls if url not in fetched]
+        if leftovers and len(missing) == 1:
+            fetched[missing[0]] = _with_requested_url(leftovers[0], missing[0])
+        elif leftovers and missing:
+            for url in missing:
+                fetched.update(self._fetch_urls(fetcher_name, [url]))
+            return fetched
+
+        for url in urls:
+            if url in fetched:
+                logger.debug(f"Successfully fetched {url} using {fetcher_name}")
+            else:
+                logger.warning(f"Fetcher {fetcher_name} returned empty content for {url}")
+        return fetched
+
+    def _fetch_url_with_fallbacks(self, url: str, fetchers_to_try: List[str]) -> Optional[ByteStream]:
+        """Fetch a single URL, trying each of the given fetchers in turn."""
         for fetcher_name in fetchers_to_try:
             fetcher = self.fetchers.get(fetcher_name)
             if not fetcher:
@@ -158,7 +298,7 @@ class ContentFetcherResolver:
 
                 if streams and streams[0].data:  # Check if content was actually fetched
                     logger.debug(f"Successfully fetched {url} using {fetcher_name}")
-                    return streams[0]
+                    return _with_requested_url(streams[0], url)
                 else:
                     logger.warning(f"Fetcher {fetcher_name} returned empty content for {url}")
 
@@ -261,9 +401,7 @@ class ScraplingLinkContentFetcher:
             except Exception as e:
                 attempt += 1
                 if attempt <= self.retry_attempts:
-                    import time
-
-                    time.sleep(min(2 * 2 ** (attempt - 1), 10))
+                    time.sleep(_retry_backoff(attempt))
                 else:
                     logger.warning(f"Failed to fetch {url} using Scrapling after {self.retry_attempts} attempts: {str(e)}")
                     self._failure_count += 1
@@ -339,8 +477,12 @@ class HaystackLinkContentFetcher:
         timeout: int = 3,
         http2: bool = False,
         client_kwargs: Optional[Dict] = None,
+        max_workers: int = 16,
+        max_per_host: int = 6,
+        cache_ttl: float = 600,
+        cache_size: int = 1024,
     ):
-        """Initialize the FallbackLinkContentFetcher.
+        """Initialize the HaystackLinkContentFetcher.
 
         Args:
             raise_on_failure (bool): Whether to raise an exception if both fetchers fail.
@@ -349,7 +491,13 @@ class HaystackLinkContentFetcher:
             timeout (int): The timeout for the primary fetcher in seconds.
             http2 (bool): Whether to use HTTP/2 for the primary fetcher.
             client_kwargs (Optional[Dict]): Additional kwargs for the primary fetcher's HTTP client.
+            max_workers (int): The maximum number of URLs fetched concurrently, in one batch passed to LinkContentFetcher.
+            max_per_host (int): The maximum number of URLs from any one host in a batch.
+            cache_ttl (float): How long fetched content is reused for the same URL, in seconds. 0 disables the cache.
+            cache_size (int): The maximum number of URLs kept in the cache.
         """
+        # LinkContentFetcher keeps its httpx client for its whole lifetime, so size the keep-alive pool for bursts of search results
+        client_kwargs = {"limits": httpx.Limits(max_connections=100, max_keepalive_connections=50), **(client_kwargs or {})}
         self.primary_fetcher = LinkContentFetcher(
             raise_on_failure=False,  # We handle failures ourselves
             user_agents=user_agents,
@@ -359,6 +507,10 @@ class HaystackLinkContentFetcher:
             client_kwargs=client_kwargs,
         )
         self.raise_on_failure = raise_on_failure
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        # Re-ranked and follow-up searches keep coming back to the same pages
+        self._cache = _StreamCache(ttl=cache_ttl, size=cache_size)
 
     def is_available(self) -> bool:
         return True
@@ -373,25 +525,56 @@ class HaystackLinkContentFetcher:
         Returns:
             Dict[str, List[ByteStream]]: A dictionary with a "streams" key containing a list of ByteStream objects.
         """
-        primary_result = self.primary_fetcher.run(urls)
-        streams = primary_result["streams"]
-
-        # Check if any streams are empty (failed to fetch)
-        failed_urls = []
         successful_streams = []
+        uncached_urls = []
+        for url in urls:
+            cached = self._cache.get(url)
+            if cached is not None:
+                logger.debug(f"Using cached content for {url}")
+                successful_streams.append(cached)
+            else:
+                uncached_urls.append(url)
 
-        for stream in streams:
-            url = stream.meta.get("url", "")
+        if len(uncached_urls) <= 1:
+            streams = self.primary_fetcher.run(uncached_urls)["streams"] if uncached_urls else []
+        else:
+            streams = self._fetch_concurrently(uncached_urls)
 
-            # Check if the stream is empty (failed to fetch)
-            if stream.data == b"":
-                failed_urls.append(url)
-                logger.info(f"Primary fetcher failed to fetch {url}, trying fallback fetcher")
+        # LinkContentFetcher returns an empty stream for a URL it failed to fetch.  Drop those,
+        # ContentFetcherResolver sends the URLs missing from the output to its fallback fetchers.
+        for stream in streams:
+            if not stream.data:
+                logger.info(f"Primary fetcher failed to fetch {stream.meta.get('url', '')}, trying fallback fetcher")
             else:
+                if stream.meta.get("url"):
+                    self._cache.put(stream.meta["url"], stream)
                 successful_streams.append(stream)
 
         return {"streams": successful_streams}
 
+    def _fetch_concurrently(self, urls: List[str]) -> List[ByteStream]:
+        """Fetch the URLs in waves, with at most max_per_host URLs from any one host in a wave.
+
+        LinkContentFetcher fetches a batch with a thread pool of its own, but nothing stops it
+        sending a whole batch of search results from one site at that site at once.  Each wave is
+        a single run() call, so the fetcher and its user agent rotation are only used by one batch at a time.
+        """
+        origin_urls: Dict[str, List[str]] = defaultdict(list)
+        for url in urls:
+            origin_urls[_url_origin(url)].append(url)
+
+        pending = list(origin_urls.values())
+        streams: List[ByteStream] = []
+        while pending:
+            wave: List[str] = []
+            for host_urls in pending:
+                take = min(self.max_per_host, self.max_workers - len(wave))
+                wave.extend(host_urls[:take])
+                del host_urls[:take]
+            pending = [host_urls for host_urls in pending if host_urls]
+            streams.extend(self.primary_fetcher.run(wave)["streams"])
+        return streams
+
 
 @component
 class JinaLinkContentFetcher:
@@ -400,22 +583,46 @@ class JinaLinkContentFetcher:
     This is used as a fallback when LinkContentFetcher fails.
     """
 
-    def __init__(self, timeout: int = 10, retry_attempts: int = 2, api_key: Secret = Secret.from_env_var("JINA_API_KEY")):
+    def __init__(
+        self,
+        timeout: int = 10,
+        retry_attempts: int = 2,
+        api_key: Secret = Secret.from_env_var("JINA_API_KEY"),
+        max_workers: int = 8,
+        cache_ttl: float = 600,
+        cache_size: int = 1024,
+    ):
         """Initialize the JinaLinkContentFetcher.
 
         Args:
             timeout (int): The timeout for the HTTP request in seconds.
             retry_attempts (int): The number of retry attempts for failed requests.
             api_key (Secret): Jina API key for authentication.
+            max_workers (int): The maximum number of URLs fetched concurrently.
+            cache_ttl (float): How long fetched content is reused for the same URL, in seconds. 0 disables the cache.
+            cache_size (int): The maximum number of URLs kept in the cache.
         """
         self.timeout = timeout
         self.retry_attempts = retry_attempts
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache = _StreamCache(ttl=cache_ttl, size=cache_size)
         try:
             self.api_key = api_key.resolve_value()
         except Exception:
             self.api_key = None
 
         self.jina_url = "https://r.jina.ai"
+        # Every request goes to the same origin, so keep one pooled HTTP/2 client instead of a new connection per URL.
+        # httpx.Client is thread safe, so the concurrent fetches in run() share it and multiplex over one connection.
+        # Keep enough idle connections for a burst of search results, and leave retrying to _fetch_with_retries.
+        transport = httpx.HTTPTransport(
+            http2=True,
+            retries=0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64, keepalive_expiry=120),
+        )
+        self._client = httpx.Client(transport=transport, timeout=self.timeout)
         self._available: Optional[bool] = None  # Cache availability status
         self._failure_count = 0  # Track consecutive failures
 
@@ -433,6 +640,15 @@ class JinaLinkContentFetcher:
         self._available = True
         return True
 
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self._client.close()
+
+    def __del__(self):
+        client = getattr(self, "_client", None)
+        if client is not None:
+            client.close()
+
     @component.output_types(streams=List[ByteStream])
     def run(self, urls: List[str]):
         """Fetch content from URLs using jina.ai service.
@@ -445,12 +661,16 @@ class JinaLinkContentFetcher:
         """
         streams = []
 
-        for url in urls:
-            metadata, stream = self._fetch_with_retries(url)
+        # Each fetch waits on a jina.ai round trip, so fetch the URLs concurrently rather than one after another
+        if len(urls) <= 1:
+            results = [self._fetch_with_retries(url) for url in urls]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(urls), self.max_workers)) as executor:
+                results = list(executor.map(self._fetch_with_retries, urls))
+
+        for metadata, stream in results:
             if metadata and stream:
-                # Update stream metadata
-                stream.meta.update(metadata)
-                stream.mime_type = stream.meta.get("content_type", None)
+                # The stream already carries its metadata and MIME type
                 streams.append(stream)
                 # Reset failure count on successful fetch
                 self._failure_count = 0
@@ -466,18 +686,23 @@ class JinaLinkContentFetcher:
         Returns:
             Tuple[Optional[Dict[str, str]], Optional[ByteStream]]: A tuple containing metadata and ByteStream.
         """
+        cached = self._cache.get(url)
+        if cached is not None:
+            logger.debug(f"Using cached jina.ai content for {url}")
+            return cached.meta, cached
+
         attempt = 0
 
         while attempt <= self.retry_attempts:
             try:
-                return self._fetch(url)
+                metadata, stream = self._fetch(url)
+                self._cache.put(url, stream)
+                return metadata, stream
             except Exception as e:
                 attempt += 1
                 if attempt <= self.retry_attempts:
                     # Wait before retry using exponential backoff
-                    import time
-
-                    time.sleep(min(2 * 2 ** (attempt - 1), 10))
+                    time.sleep(_retry_backoff(attempt))
                 else:
                     logger.warning(f"Failed to fetch {url} using jina.ai after {self.retry_attempts} attempts: {str(e)}")
                     self._failure_count += 1
@@ -495,24 +720,23 @@ class JinaLinkContentFetcher:
         Returns:
             Tuple[Dict[str, str], ByteStream]: A tuple containing metadata and ByteStream.
         """
+        # Ask for the page as plain markdown so the body can be used as is, with no JSON to decode and re-encode.
+        # https://github.com/jina-ai/reader#using-request-headers
+        headers = {"Accept": "text/plain", "X-Return-Format": "markdown"}
         if self.api_key:
-            # https://github.com/jina-ai/reader/tree/main?tab=readme-ov-file#streaming-mode
-            headers = {"Authorization": f"Bearer {self.api_key}", "Accept": "text/event-stream"}
-        else:
-            headers = {}
-        with httpx.Client(timeout=self.timeout) as client:
-            response = client.get(f"{self.jina_url}/{url}", headers=headers)
-
-            if response.status_code != 200:
-                logger.error(f"Link failure for url {url} status_code={response.status_code} text={response.text}")
-                response.raise_for_status()
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        response = self._client.get(f"{self.jina_url}/{url}", headers=headers)
 
-            # Extract content from response
-            content = response.json().get("content", "")
-            content_type = response.json().get("content_type", "text/html")
+        # Anything but a 200 with a body, including a 202 or 204 with a placeholder or nothing at all, is a failure,
+        # so it is retried and falls back to another fetcher instead of being cached as the page content
+        if response.status_code != 200:
+            logger.error(f"Link failure for url {url} status_code={response.status_code} text={response.text}")
+            raise RuntimeError(f"HTTP {response.status_code}: {response.reason_phrase}")
+        if not response.content.strip():
+            raise RuntimeError(f"Empty response from jina.ai for {url}")
 
-            # Create ByteStream and metadata
-            stream = ByteStream(data=content.encode("utf-8"))
-            metadata = {"content_type": content_type, "url": url}
+        # Create ByteStream and metadata, passing the response bytes through without a copy
+        metadata = {"content_type": "text/markdown", "url": url}
+        stream = ByteStream(data=response.content, meta=metadata, mime_type=metadata["content_type"])
 
-            return metadata, stream
+        return metadata, stream
@@ -20,6 +20,8 @@ raw_url3 = "https://raw.githubusercontent.com/torvalds/linux/master/Documentatio
 class GithubIssueContentResolver:
     """This class looks for github issues and directs them to GitHubIssueViewer"""
 
+    domains = ("github.com",)
+
     def __init__(self, github_token: Optional[Secret] = None, raise_on_failure: bool = False):
         issue_pattern = r"https?://(?:(?:www|m)\.)?github\.com/([^/]+)/([^/]+)/issues/(\d+)(?:[/?#].*)?$"
 
@@ -93,6 +95,8 @@ class GithubIssueContentResolver:
 class GithubRepoContentResolver:
     """This class looks for files and directories in a github repository and sends them to GitHubRepoViewer"""
 
+    domains = ("github.com", "raw.githubusercontent.com")
+
     def __init__(self, github_token: Optional[Secret] = None, raise_on_failure: bool = False):
         # This matches every github repo file.
         repo_pattern = r"^(?:https?:\/\/)?github\.com\/([a-zA-Z0-9_-]+)\/([a-zA-Z0-9_-]+)(?:\/(?:blob|tree|raw|commit)\/([a-zA-Z0-9._-]+)\/(.*))?$"
@@ -208,6 +212,8 @@ class GithubRepoContentResolver:
 class GithubPRContentResolver:
     """This class looks for GitHub pull requests and directs them to GitHubPRViewer"""
 
+    domains = ("github.com",)
+
     def __init__(self, github_token: Optional[Secret] = None, raise_on_failure: bool = False):
         pr_pattern = r"https?://(?:(?:www|m)\.)?github\.com/([^/]+)/([^/]+)/pull/(\d+)(?:[/?#].*)?$"
 
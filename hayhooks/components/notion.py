@@ -11,6 +11,8 @@ from notion_haystack import NotionExporter
 
 @component
 class NotionContentResolver:
+    domains = ("notion.so",)
+
     def __init__(self, api_key: Secret = Secret.from_env_var("NOTION_API_KEY"), raise_on_failure: bool = False):
         self.exporter = None
         self.raise_on_failure = raise_on_failure
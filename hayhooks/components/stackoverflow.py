@@ -1,5 +1,8 @@
 import asyncio
 import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Literal, Optional, Union
 
@@ -23,6 +26,9 @@ DEFAULT_TIMEOUT = 10  # Default timeout in seconds
 # Stack Overflow API base URL
 STACKOVERFLOW_API = "https://api.stackexchange.com/2.3"
 
+# Matches question URLs like https://stackoverflow.com/questions/12345/title or https://stackoverflow.com/questions/12345
+_QUESTION_ID_RE = re.compile(r"stackoverflow\.com/questions/(\d+)")
+
 
 class StackOverflowBase:
     """Base class for Stack Overflow components with shared functionality."""
@@ -38,6 +44,11 @@ class StackOverflowBase:
         self.is_enabled = True  # still enabled even if no API key
         self.timeout = timeout
         self.request_timestamps = []  # Track request timestamps for rate limiting
+        self._rate_limit_lock = threading.Lock()  # Requests may be made from several threads at once
+        # Every request goes to api.stackexchange.com, so keep one pooled HTTP/2 client instead of a new connection per call.
+        # httpx.Client is thread safe, so concurrent question fetches share it and multiplex over one connection.
+        transport = httpx.HTTPTransport(http2=True, limits=httpx.Limits(max_keepalive_connections=8))
+        self._client = httpx.Client(transport=transport, timeout=timeout)
         try:
             self.api_key = api_key.resolve_value()
             self.access_token = access_token.resolve_value() if access_token else None
@@ -46,17 +57,27 @@ class StackOverflowBase:
             self.api_key = None
             self.access_token = None
 
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self._client.close()
+
+    def __del__(self):
+        client = getattr(self, "_client", None)
+        if client is not None:
+            client.close()
+
     def _check_rate_limit(self) -> bool:
         """Check if we're within rate limits."""
-        now = datetime.now()
-        # Remove timestamps outside the window
-        self.request_timestamps = [timestamp for timestamp in self.request_timestamps if now - timestamp < timedelta(milliseconds=RATE_LIMIT_WINDOW_MS)]
+        with self._rate_limit_lock:
+            now = datetime.now()
+            # Remove timestamps outside the window
+            self.request_timestamps = [timestamp for timestamp in self.request_timestamps if now - timestamp < timedelta(milliseconds=RATE_LIMIT_WINDOW_MS)]
 
-        if len(self.request_timestamps) >= MAX_REQUESTS_PER_WINDOW:
-            return False
+            if len(self.request_timestamps) >= MAX_REQUESTS_PER_WINDOW:
+                return False
 
-        self.request_timestamps.append(now)
-        return True
+            self.request_timestamps.append(now)
+            return True
 
     def _prepare_base_params(self, **kwargs) -> Dict[str, Any]:
         """Prepare base parameters for Stack Overflow API requests."""
@@ -112,7 +133,7 @@ class StackOverflowBase:
                 return self.fetch_answers(question_id)
 
             logger.debug(f"_fetch_answers: url={url} params={params}")
-            response = httpx.get(url, params=params, timeout=self.timeout)
+            response = self._client.get(url, params=params)
             response.raise_for_status()
             # logger.debug(f"_fetch_answers: response = {json.dumps(response.json(), indent=2)}")
             data = response.json()
@@ -162,7 +183,7 @@ class StackOverflowBase:
                 time.sleep(RETRY_AFTER_MS / 1000)
                 return self._fetch_comments(post_id)
 
-            response = httpx.get(url, params=params, timeout=self.timeout)
+            response = self._client.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get("items", [])
@@ -346,7 +367,7 @@ class StackOverflowErrorSearch(StackOverflowBase):
                 time.sleep(RETRY_AFTER_MS / 1000)
                 return self.run(error_message, language, technologies, min_score, include_comments, limit)
 
-            response = httpx.get(url, params=params, timeout=self.timeout)
+            response = self._client.get(url, params=params)
             response.raise_for_status()
             data = response.json()
 
@@ -467,7 +488,7 @@ class StackOverflowStackTraceAnalyzer(StackOverflowBase):
 
             headers = {"Accept-Encoding": "gzip,deflate"}
             # logger.debug(f"run: url={url} params={params}")
-            response = httpx.get(url, params=params, timeout=self.timeout, headers=headers)
+            response = self._client.get(url, params=params, headers=headers)
             # logger.debug(f"run: response = {response.text}")
             response.raise_for_status()
             data = response.json()
@@ -489,14 +510,27 @@ class StackOverflowStackTraceAnalyzer(StackOverflowBase):
 class StackOverflowContentResolver:
     """A resolver that uses the StackExchange API to fetch content from StackOverflow URLs."""
 
+    domains = ("stackoverflow.com",)
+
     def __init__(
         self,
         api_key: Secret = Secret.from_env_var("STACKOVERFLOW_API_KEY"),
         access_token: Optional[Secret] = None,
         timeout: int = DEFAULT_TIMEOUT,
         raise_on_failure: bool = False,
+        max_workers: int = 8,
     ):
+        """Initialize the StackOverflowContentResolver.
+
+        Args:
+            api_key (Secret): Stack Overflow API key
+            access_token (Optional[Secret]): Optional Stack Overflow access token for authenticated requests
+            timeout (int): HTTP request timeout in seconds
+            raise_on_failure (bool): Whether to raise an exception if fetching fails
+            max_workers (int): The maximum number of questions fetched concurrently
+        """
         self.raise_on_failure = raise_on_failure
+        self.max_workers = max_workers
         self.stackoverflow_client = StackOverflowBase(
             api_key=api_key,
             access_token=access_token,
@@ -505,55 +539,73 @@ class StackOverflowContentResolver:
 
     @component.output_types(streams=List[ByteStream])
     def run(self, urls: List[str]):
-        streams = []
-
-        for url in urls:
-            try:
-                # Extract question ID from URL
-                question_id = self._extract_question_id(url)
-                if not question_id:
-                    logger.warning(f"Could not extract question ID from {url}")
-                    continue
-
-                # Fetch question details
-                params = self.stackoverflow_client._prepare_base_params(
-                    filter="withbody",  # Include question body
-                    site="stackoverflow",
-                )
-                api_url = f"{STACKOVERFLOW_API}/questions/{question_id}"
-
-                response = httpx.get(api_url, params=params, timeout=self.stackoverflow_client.timeout)
-                response.raise_for_status()
-                data = response.json()
+        # Each question costs two API round trips, so fetch the questions concurrently rather than one after another
+        if len(urls) <= 1:
+            results = [self._fetch_question(url) for url in urls]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(urls), self.max_workers)) as executor:
+                results = list(executor.map(self._fetch_question, urls))
+
+        return {"streams": [stream for stream in results if stream is not None]}
+
+    def _fetch_question(self, url: str) -> Optional[ByteStream]:
+        """Fetch a question and its answers as a markdown ByteStream.
 
-                if not data.get("items"):
-                    logger.warning(f"No question found for ID {question_id}")
-                    continue
+        Args:
+            url (str): The StackOverflow question URL.
+
+        Returns:
+            Optional[ByteStream]: The question and answers as markdown, or None if they could not be fetched.
+        """
+        try:
+            # Extract question ID from URL
+            question_id = self._extract_question_id(url)
+            if not question_id:
+                logger.warning(f"Could not extract question ID from {url}")
+                return None
+
+            # Fetch question details
+            params = self.stackoverflow_client._prepare_base_params(
+                filter="withbody",  # Include question body
+                site="stackoverflow",
+            )
+            api_url = f"{STACKOVERFLOW_API}/questions/{question_id}"
+
+            response = self.stackoverflow_client._client.get(api_url, params=params)
+            response.raise_for_status()
+            data = response.json()
 
-                question = data["items"][0]
+            if not data.get("items"):
+                logger.warning(f"No question found for ID {question_id}")
+                return None
 
-                # Fetch answers
-                answers = self.stackoverflow_client.fetch_answers(question_id)
+            question = data["items"][0]
 
-                # Combine question and answers into a single document
-                result = {"question": question, "answers": answers}
+            # Fetch answers
+            answers = self.stackoverflow_client.fetch_answers(question_id)
 
-                # Format the content as markdown
-                content = self._format_as_markdown(result)
+            # Combine question and answers into a single document
+            result = {"question": question, "answers": answers}
 
-                # Create ByteStream
-                stream = ByteStream(data=content.encode("utf-8"))
-                stream.meta = {"url": url, "content_type": "text/markdown", "title": question.get("title", ""), "source": "stackoverflow"}
-                stream.mime_type = "text/markdown"
+            # Format the content as markdown
+            content = self._format_as_markdown(result)
 
-                streams.append(stream)
+            # Create ByteStream
+            stream = ByteStream(data=content.encode("utf-8"))
+            stream.meta = {"url": url, "content_type": "text/markdown", "title": question.get("title", ""), "source": "stackoverflow"}
+            stream.mime_type = "text/markdown"
 
-            except Exception as e:
-                logger.warning(f"Failed to fetch {url} using StackOverflow API: {str(e)}")
-                if self.raise_on_failure:
-                    raise e
+            return stream
 
-        return {"streams": streams}
+        except Exception as e:
+            logger.warning(f"Failed to fetch {url} using StackOverflow API: {str(e)}")
+            if self.raise_on_failure:
+                raise e
+            return None
+
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self.stackoverflow_client.close()
 
     def can_handle(self, url: str) -> bool:
         # Check if the URL is from StackOverflow
@@ -561,12 +613,7 @@ class StackOverflowContentResolver:
 
     def _extract_question_id(self, url: str) -> Optional[int]:
         """Extract the question ID from a StackOverflow URL."""
-        import re
-
-        # Match patterns like:
-        # https://stackoverflow.com/questions/12345/title
-        # https://stackoverflow.com/questions/12345
-        match = re.search(r"stackoverflow\.com/questions/(\d+)", url)
+        match = _QUESTION_ID_RE.search(url)
         if match:
             return int(match.group(1))
         return None
@@ -577,24 +624,23 @@ class StackOverflowContentResolver:
         answers = result["answers"]
 
         # Format question
-        md = f"# {question.get('title', 'Untitled Question')}\n\n"
-        md += f"**Score**: {question.get('score', 0)} | "
-        md += f"**Asked by**: {question.get('owner', {}).get('display_name', 'Anonymous')} | "
-        md += f"**Date**: {question.get('creation_date', '')}\n\n"
-        md += question.get("body", "")
-        md += "\n\n---\n\n"
-
-        # Format answers
-        md += f"## {len(answers)} Answers\n\n"
-
-        # Sort answers by score (highest first)
-        sorted_answers = sorted(answers, key=lambda x: x.get("score", 0), reverse=True)
-
-        for i, answer in enumerate(sorted_answers):
-            md += f"### Answer {i + 1} (Score: {answer.get('score', 0)})\n\n"
-            md += f"**Answered by**: {answer.get('owner', {}).get('display_name', 'Anonymous')} | "
-            md += f"**Date**: {answer.get('creation_date', '')}\n\n"
-            md += answer.get("body", "")
-            md += "\n\n---\n\n"
-
-        return md
+        parts = [
+            f"# {question.get('title', 'Untitled Question')}\n\n",
+            f"**Score**: {question.get('score', 0)} | ",
+            f"**Asked by**: {question.get('owner', {}).get('display_name', 'Anonymous')} | ",
+            f"**Date**: {question.get('creation_date', '')}\n\n",
+            question.get("body", ""),
+            "\n\n---\n\n",
+        ]
+
+        # Format answers, which fetch_answers already returns highest score first
+        parts.append(f"## {len(answers)} Answers\n\n")
+
+        for i, answer in enumerate(answers, start=1):
+            score = answer.get("score", 0)
+            owner = (answer.get("owner") or {}).get("display_name", "Anonymous")
+            date = answer.get("creation_date", "")
+            body = answer.get("body", "")
+            parts.append(f"### Answer {i} (Score: {score})\n\n**Answered by**: {owner} | **Date**: {date}\n\n{body}\n\n---\n\n")
+
+        return "".join(parts)
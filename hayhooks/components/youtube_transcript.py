@@ -32,6 +32,8 @@ class YouTubeTranscriptResolver:
     and falls back to the youtube_transcript_api library.
     """
 
+    domains = ("youtube.com", "youtu.be")
+
     def __init__(
         self,
         oauth_provider: GoogleOAuth,
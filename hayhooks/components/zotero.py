@@ -1,9 +1,12 @@
+import functools
 import json
 import mimetypes
 import os
 import re
 import sqlite3
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 from haystack import component
 from haystack.dataclasses.byte_stream import ByteStream
@@ -27,12 +30,80 @@ ACADEMIC_DOMAINS = [
     "sagepub.com",  #
     "oup.com",  #
     "elsevier.com",  #
-    "apa.org"  #
-    "taylorfrancis.com"  #
-    "sagepub.com"  #
+    "apa.org",  #
+    "taylorfrancis.com",  #
     "royalsocietypublishing.org",
 ]
 
+# Matches any of the academic domains in a single pass over the URL
+_ACADEMIC_DOMAIN_RE = re.compile("|".join(map(re.escape, ACADEMIC_DOMAINS)))
+
+# Patterns matched against every URL the resolver sees
+_DOI_URL_RE = re.compile(r"doi\.org/(.+?)(?:$|[?#])")
+_DOI_PDF_RE = re.compile(r"/(10\.\d{4,}[/.][\w.]+)\.pdf")
+_ITEM_FILE_RE = re.compile(r"/items/([A-Z0-9]+)/file")
+
+# Applied to the long-lived connection: WAL lets readers run alongside a sync, and mmap avoids read() copies on lookups
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+# Upper bound on cached URL/DOI lookups before the cache is reset
+_SEARCH_CACHE_SIZE = 4096
+
+
+# Items requested per Zotero API call (the API's maximum), and written per transaction while syncing
+_SYNC_PAGE_SIZE = 100
+_SYNC_CHUNK_SIZE = 500
+
+
+def _canonical_url(url: Optional[str]) -> Optional[str]:
+    """Normalise a URL for matching, dropping the scheme, a "www." prefix, the fragment and any trailing slash.
+
+    The query string is kept, since some sites identify papers by it (e.g. SSRN's abstract_id).
+    """
+    if not url or not url.strip():
+        return None
+    url = url.strip()
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    host = parts.netloc.lower().removeprefix("www.")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{host}{parts.path.rstrip('/')}{query}"
+
+
+def _canonical_doi(doi: Optional[str]) -> Optional[str]:
+    """Normalise a DOI for matching; DOIs are case-insensitive."""
+    if not doi or not doi.strip():
+        return None
+    return doi.strip().lower()
+
+
+# Columns holding the canonical URL and DOI of each item, with the item field and function that produce their values
+_SEARCH_COLUMNS = {"url": ("url", _canonical_url), "doi": ("DOI", _canonical_doi)}
+
+
+def _item_row(item: dict) -> Tuple[Optional[str], Optional[str], str, Optional[str], Optional[str]]:
+    """Build the zotero_items_json row for a Zotero item."""
+    data = item.get("data", {})
+    return (
+        item.get("key"),
+        data.get("dateModified"),
+        json.dumps(item, separators=(",", ":")),  # Store the whole item as a compact JSON string
+        _canonical_url(data.get("url")),
+        _canonical_doi(data.get("DOI")),
+    )
+
+
+def _regexp(pattern, text):
+    """Case-insensitive REGEXP function for SQLite."""
+    if text is None:
+        return False
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
 
 class ZoteroDatabase:
     """A class to handle Zotero database operations.
@@ -123,34 +194,80 @@ class ZoteroDatabase:
 
         logger.info(f"Using Zotero SQLite database path: {self.db_file}")
 
+        # A single connection is shared by every query; the lock keeps a sync transaction from interleaving with lookups from other threads
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+        # The JSON of the items matching each URL/DOI lookup, keyed by (column, value) and dropped whenever a sync changes the library.
+        # Kept as text and decoded on every read, so callers can't change the cached items.
+        self._search_cache: Dict[Tuple[str, str], List[str]] = {}
+
         # Initialize the database
         self.init_json_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the long-lived connection in autocommit mode, so transactions are explicit."""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function("REGEXP", 2, _regexp)
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the open connection, raising if init_json_db could not open one."""
+        if self._conn is None:
+            raise RuntimeError(f"Zotero SQLite database {self.db_file} is not initialized")
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __del__(self):
+        conn = getattr(self, "_conn", None)
+        if conn is not None:
+            conn.close()
+
     def init_json_db(self) -> None:
         """Initialize the SQLite database for storing Zotero items."""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            cursor.execute("""
-                           CREATE TABLE IF NOT EXISTS zotero_items_json
-                           (
-                               item_key      TEXT PRIMARY KEY,
-                               date_modified TEXT,
-                               item_data     TEXT
-                           );
-                           """)
-            # Create indexes on JSON properties to speed up searches
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_json_doi ON zotero_items_json (json_extract(item_data, '$.data.DOI'));")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_json_url ON zotero_items_json (json_extract(item_data, '$.data.url'));")
-
-            # Create a table to store the library version for incremental syncs
-            version_table = "CREATE TABLE IF NOT EXISTS zotero_library_version(id INTEGER PRIMARY KEY CHECK(id =1),version INTEGER NOT NULL DEFAULT 0);"
-            cursor.execute(version_table)
-            # Insert a default version if it doesn't exist
-            cursor.execute("INSERT OR IGNORE INTO zotero_library_version (id, version) VALUES (1, 0);")
-
-            conn.commit()
-            conn.close()
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+                cursor = self._conn.cursor()
+                cursor.execute("""
+                               CREATE TABLE IF NOT EXISTS zotero_items_json
+                               (
+                                   item_key      TEXT PRIMARY KEY,
+                                   date_modified TEXT,
+                                   item_data     TEXT,
+                                   url           TEXT,
+                                   doi           TEXT
+                               );
+                               """)
+                # Canonical URL and DOI columns, added to databases created before they existed and backfilled from the stored items
+                existing_columns = {row[1] for row in cursor.execute("PRAGMA table_info(zotero_items_json)")}
+                for column, (field, canonicalize) in _SEARCH_COLUMNS.items():
+                    if column not in existing_columns:
+                        cursor.execute(f"ALTER TABLE zotero_items_json ADD COLUMN {column} TEXT")
+                        rows = cursor.execute(f"SELECT item_key, json_extract(item_data, '$.data.{field}') FROM zotero_items_json").fetchall()
+                        cursor.executemany(f"UPDATE zotero_items_json SET {column} = ? WHERE item_key = ?", [(canonicalize(value), key) for key, value in rows])
+
+                # Index the canonical columns for lookups by URL and DOI
+                cursor.execute("DROP INDEX IF EXISTS idx_json_doi")
+                cursor.execute("DROP INDEX IF EXISTS idx_json_url")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_doi ON zotero_items_json (doi);")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_url ON zotero_items_json (url);")
+
+                # Create a table to store the library version for incremental syncs
+                version_table = "CREATE TABLE IF NOT EXISTS zotero_library_version(id INTEGER PRIMARY KEY CHECK(id =1),version INTEGER NOT NULL DEFAULT 0);"
+                cursor.execute(version_table)
+                # Insert a default version if it doesn't exist
+                cursor.execute("INSERT OR IGNORE INTO zotero_library_version (id, version) VALUES (1, 0);")
+
             logger.info(f"Initialized Zotero SQLite database at {self.db_file}")
         except Exception as e:
             logger.error(f"Failed to initialize Zotero SQLite database: {str(e)}")
@@ -167,63 +284,150 @@ class ZoteroDatabase:
             int: The number of items synced.
         """
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-
             # Get the last synced library version
-            cursor.execute("SELECT version FROM zotero_library_version WHERE id = 1")
-            result = cursor.fetchone()
+            with self._lock:
+                result = self._connection().execute("SELECT version FROM zotero_library_version WHERE id = 1").fetchone()
             last_version = result[0] if result else 0
 
+            # Get the current library version first, so anything modified while paging is picked up by the next sync
+            current_version = zotero_client.last_modified_version()
+
             # Fetch items from Zotero that have changed since the last sync
             if last_version > 0:
                 logger.info(f"Performing incremental sync from version {last_version}")
                 # Use items with since parameter for incremental sync
-                items = zotero_client.everything(zotero_client.items(since=last_version))
+                fetch_page = functools.partial(zotero_client.items, since=last_version)
             else:
                 logger.info("Performing initial full sync")
                 # For the first sync, get all items
-                items = zotero_client.everything(zotero_client.top())
+                fetch_page = zotero_client.top
+
+            # Page through the items, writing them in chunks so memory stays bounded however large the library is
+            synced = 0
+            rows = []
+            while True:
+                page = fetch_page(limit=_SYNC_PAGE_SIZE, start=synced + len(rows))
+                rows.extend(_item_row(item) for item in page)
+                if len(page) < _SYNC_PAGE_SIZE:
+                    break
+                if len(rows) >= _SYNC_CHUNK_SIZE:
+                    self._write_items(rows)
+                    synced += len(rows)
+                    rows = []
+
+            # The new version is only stored with the last chunk, so an interrupted sync starts again from the old one
+            self._write_items(rows, version=current_version)
+            synced += len(rows)
+
+            logger.info(f"Synced {synced} items from Zotero to SQLite database (version {current_version})")
+            return synced
+        except Exception as e:
+            logger.error(f"Failed to sync Zotero items to SQLite database: {str(e)}")
+            if self.raise_on_failure:
+                raise e
+            return 0
+
+    def _write_items(self, rows: List[tuple], version: Optional[int] = None) -> None:
+        """Write item rows, and optionally the new library version, in one transaction.
 
-            for item in items:
+        Args:
+            rows (List[tuple]): Rows built by _item_row.
+            version (Optional[int]): The library version to store, if any.
+        """
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute("BEGIN")
+            try:
                 # INSERT OR REPLACE will update if item_key exists, or insert if new
-                cursor.execute(
+                cursor.executemany(
                     """
                 INSERT OR REPLACE INTO zotero_items_json 
-                (item_key, date_modified, item_data)
-                VALUES (?, ?, ?)
+                (item_key, date_modified, item_data, url, doi)
+                VALUES (?, ?, ?, ?, ?)
                 """,
-                    (
-                        item.get("key"),
-                        item.get("data", {}).get("dateModified"),
-                        json.dumps(item),  # Store the whole item as a JSON string
-                    ),
+                    rows,
                 )
 
-            # Get the current library version
-            current_version = zotero_client.last_modified_version()
+                if version is not None:
+                    # Update the stored library version
+                    cursor.execute("UPDATE zotero_library_version SET version = ? WHERE id = 1", (version,))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
 
-            # Update the stored library version
-            cursor.execute("UPDATE zotero_library_version SET version = ? WHERE id = 1", (current_version,))
+            if rows:
+                self._search_cache.clear()
 
-            conn.commit()
-            conn.close()
-            logger.info(f"Synced {len(items)} items from Zotero to SQLite database (version {current_version})")
-            return len(items)
+    def _search_top_level_items(self, column: str, values: List[str]) -> Dict[str, List[dict]]:
+        """Find top-level, non-attachment items whose canonical URL or DOI matches any of the values.
+
+        Values missing from the cache are looked up with a single indexed statement, and every result is cached until the next sync that changes the library.
+
+        Args:
+            column (str): The column to match, "url" or "doi".
+            values (List[str]): The URLs or DOIs to look up.
+
+        Returns:
+            Dict[str, List[dict]]: The matching items for each value, empty when nothing matches.
+        """
+        _, canonicalize = _SEARCH_COLUMNS[column]
+        canonical = {value: canonicalize(value) for value in values}
+
+        # Check, query and fill the cache under the lock, so a lookup racing a sync can't cache results from before it
+        with self._lock:
+            cached = {key: self._search_cache.get((column, key)) for key in canonical.values() if key is not None}
+            misses = [key for key, items in cached.items() if items is None]
+
+            if misses:
+                found: Dict[str, List[str]] = {key: [] for key in misses}
+                placeholders = ", ".join("?" for _ in misses)
+                cursor = self._connection().execute(
+                    f"""
+                    SELECT {column}, item_data
+                    FROM zotero_items_json
+                    WHERE {column} IN ({placeholders})
+                      AND json_extract(item_data, '$.data.itemType') != 'attachment'
+                      AND json_extract(item_data, '$.data.parentItem') IS NULL
+                    """,
+                    misses,
+                )
+                for key, item_data in cursor.fetchall():
+                    found[key].append(item_data)
+
+                if len(self._search_cache) + len(found) > _SEARCH_CACHE_SIZE:
+                    self._search_cache.clear()
+                for key, items in found.items():
+                    self._search_cache[(column, key)] = items
+                cached.update(found)
+
+        results: Dict[str, List[dict]] = {}
+        for value, key in canonical.items():
+            matches = cached.get(key) if key is not None else None
+            results[value] = [json.loads(item_data) for item_data in matches or []]
+        return results
+
+    def search_json_by_dois_sqlite(self, target_dois: List[str]) -> Dict[str, List[dict]]:
+        try:
+            return self._search_top_level_items("doi", target_dois)
         except Exception as e:
-            logger.error(f"Failed to sync Zotero items to SQLite database: {str(e)}")
+            logger.error(f"Failed to search SQLite database by DOI: {str(e)}")
             if self.raise_on_failure:
                 raise e
-            return 0
+            return {}
+
+    def search_json_by_urls_sqlite(self, target_urls: List[str]) -> Dict[str, List[dict]]:
+        try:
+            return self._search_top_level_items("url", target_urls)
+        except Exception as e:
+            logger.error(f"Failed to search SQLite database by URL: {str(e)}")
+            if self.raise_on_failure:
+                raise e
+            return {}
 
     def search_json_by_doi_sqlite(self, target_doi: str) -> List[dict]:
         try:
-            query = [
-                {"DOI": target_doi},
-                {"itemType": {"$ne": "attachment"}},  # Ensures 'data.itemType' is not 'attachment'
-                {"parentItem": {"$exists": False}},  # Ensures 'data.parentItem' is null (i.e., top-level)
-            ]
-            return self.find_items_by_mongo_query(query)
+            return self._search_top_level_items("doi", [target_doi])[target_doi]
         except Exception as e:
             logger.error(f"Failed to search SQLite database by DOI: {str(e)}")
             if self.raise_on_failure:
@@ -232,12 +436,7 @@ class ZoteroDatabase:
 
     def search_json_by_url_sqlite(self, target_url: str) -> List[dict]:
         try:
-            query = [
-                {"url": target_url},
-                {"itemType": {"$ne": "attachment"}},  # Ensures 'data.itemType' is not 'attachment'
-                {"parentItem": {"$exists": False}},  # Ensures 'data.parentItem' is null (i.e., top-level)
-            ]
-            return self.find_items_by_mongo_query(query)
+            return self._search_top_level_items("url", [target_url])[target_url]
         except Exception as e:
             logger.error(f"Failed to search SQLite database by URL: {str(e)}")
             if self.raise_on_failure:
@@ -369,45 +568,32 @@ class ZoteroDatabase:
                         subqueries.append(subquery_sql)
                         params.extend(current_query_params)
 
-            # Connect to the database
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-
-            # Add custom REGEXP function for case-insensitive regex matching
-            def regexp(pattern, text):
-                if text is None:
-                    return False
-                import re
-
-                return re.search(pattern, text, re.IGNORECASE) is not None
-
-            conn.create_function("REGEXP", 2, regexp)
-
             # Build the final query using INTERSECT to combine all subqueries
             final_sql_query = " INTERSECT ".join(subqueries)
 
-            # Get the matching item keys
-            cursor.execute(final_sql_query, params)
-            item_keys = [row[0] for row in cursor.fetchall()]
+            with self._lock:
+                cursor = self._connection().cursor()
 
-            if not item_keys:
-                conn.close()
-                return []
+                # Get the matching item keys
+                cursor.execute(final_sql_query, params)
+                item_keys = [row[0] for row in cursor.fetchall()]
 
-            # Get the full item data for the matching keys
-            placeholders = ", ".join(["?" for _ in item_keys])
-            cursor.execute(
-                f"""
-                SELECT item_data
-                FROM zotero_items_json
-                WHERE item_key IN ({placeholders})
-                """,
-                item_keys,
-            )
+                if not item_keys:
+                    return []
 
-            results = [json.loads(row[0]) for row in cursor.fetchall()]
-            conn.close()
-            return results
+                # Get the full item data for the matching keys
+                placeholders = ", ".join(["?" for _ in item_keys])
+                cursor.execute(
+                    f"""
+                    SELECT item_data
+                    FROM zotero_items_json
+                    WHERE item_key IN ({placeholders})
+                    """,
+                    item_keys,
+                )
+                rows = cursor.fetchall()
+
+            return [json.loads(row[0]) for row in rows]
         except Exception as e:
             logger.error(f"Failed to search SQLite database by MongoDB query: {str(e)}")
             if self.raise_on_failure:
@@ -422,6 +608,8 @@ class ZoteroContentResolver:
     Uses a local SQLite database to cache Zotero items for faster querying.
     """
 
+    domains = ("api.zotero.org", "doi.org", *ACADEMIC_DOMAINS)
+
     def __init__(
         self,
         library_id: Secret = Secret.from_env_var("ZOTERO_LIBRARY_ID"),
@@ -462,6 +650,10 @@ class ZoteroContentResolver:
         else:
             logger.info("No ZOTERO_LIBRARY_ID or ZOTERO_API_KEY provided. ZoteroContentResolver is disabled.")
 
+    def close(self) -> None:
+        """Close the local database connection."""
+        self.db.close()
+
     def _find_matching_item(self, url: str) -> Optional[dict]:
         """Find a matching Zotero item for the given URL.
 
@@ -471,25 +663,33 @@ class ZoteroContentResolver:
         Returns:
             Optional[dict]: The matching Zotero item, or None if no match is found.
         """
-        matching_item = None
+        return self._find_matching_items([url]).get(url)
 
+    def _find_matching_items(self, urls: List[str]) -> Dict[str, dict]:
+        """Find matching Zotero items for the given URLs, first by URL and then by DOI.
+
+        Args:
+            urls (List[str]): The URLs to find matching items for.
+
+        Returns:
+            Dict[str, dict]: The first matching Zotero item for each URL that has one.
+        """
         # Always sync before every search
         self.db.sync_zotero_to_json_sqlite(self.zotero_client)
 
-        # First, try to find the item by URL in the local database
-        url_matches = self.db.search_json_by_url_sqlite(url)
-        if url_matches:
-            matching_item = url_matches[0]  # Take the first match
+        # First, try to find the items by URL in the local database
+        url_matches = self.db.search_json_by_urls_sqlite(urls)
+        matching_items = {url: matches[0] for url, matches in url_matches.items() if matches}
 
         # If no match by URL, try to find by DOI
-        if not matching_item:
-            doi = self._extract_doi(url)
-            if doi:
-                doi_matches = self.db.search_json_by_doi_sqlite(doi)
-                if doi_matches:
-                    matching_item = doi_matches[0]  # Take the first match
+        dois = {url: doi for url in urls if url not in matching_items and (doi := self._extract_doi(url))}
+        if dois:
+            doi_matches = self.db.search_json_by_dois_sqlite(list(dois.values()))
+            for url, doi in dois.items():
+                if doi_matches.get(doi):
+                    matching_items[url] = doi_matches[doi][0]  # Take the first match
 
-        return matching_item
+        return matching_items
 
     def _fetch_zotero_file_by_key(self, item_key: str, url: str, streams: List[ByteStream]) -> bool:
         """Fetch a Zotero file directly by its item key.
@@ -672,12 +872,22 @@ class ZoteroContentResolver:
             logger.warning("ZoteroContentResolver is disabled. Skipping.")
             return {"streams": streams}
 
+        # Look up every URL that isn't a Zotero API file URL in one pass over the database
+        lookup_urls = [url for url in urls if not ("api.zotero.org" in url and "/file" in url)]
+        try:
+            matching_items = self._find_matching_items(lookup_urls) if lookup_urls else {}
+        except Exception as e:
+            logger.warning(f"Failed to look up {len(lookup_urls)} URLs in the Zotero database: {str(e)}")
+            if self.raise_on_failure:
+                raise e
+            matching_items = {}
+
         for url in urls:
             try:
                 # Check if this is a Zotero API file URL
                 if "api.zotero.org" in url and "/file" in url:
                     # Extract item key from URL: https://api.zotero.org/users/{userID}/items/{itemKey}/file/view
-                    item_key_match = re.search(r"/items/([A-Z0-9]+)/file", url)
+                    item_key_match = _ITEM_FILE_RE.search(url)
                     if item_key_match:
                         item_key = item_key_match.group(1)
                         self._fetch_zotero_file_by_key(item_key, url, streams)
@@ -685,8 +895,7 @@ class ZoteroContentResolver:
                         logger.warning(f"Could not extract item key from Zotero API URL: {url}")
                     continue
 
-                # Find matching item
-                matching_item = self._find_matching_item(url)
+                matching_item = matching_items.get(url)
 
                 # If no match, log and continue to next URL
                 if not matching_item:
@@ -723,7 +932,7 @@ class ZoteroContentResolver:
         if "doi.org" in url:
             return True
 
-        if any(domain in url for domain in ACADEMIC_DOMAINS):
+        if _ACADEMIC_DOMAIN_RE.search(url):
             matching_item = self._find_matching_item(url)
             if matching_item and len(matching_item) > 0:
                 return True
@@ -733,12 +942,12 @@ class ZoteroContentResolver:
     def _extract_doi(self, url: str) -> Optional[str]:
         """Extract the DOI from a URL."""
         # Extract DOI from doi.org URLs
-        doi_match = re.search(r"doi\.org/(.+?)(?:$|[?#])", url)
+        doi_match = _DOI_URL_RE.search(url)
         if doi_match:
             return doi_match.group(1)
 
         # Extract DOI from PDF URLs with DOI in the filename
-        pdf_doi_match = re.search(r"/(10\.\d{4,}[/.][\w.]+)\.pdf", url)
+        pdf_doi_match = _DOI_PDF_RE.search(url)
         if pdf_doi_match:
             return pdf_doi_match.group(1)
 
@@ -1,20 +1,22 @@
 import os
 from datetime import datetime
-from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Union
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Generator, Iterator, List, Optional, Tuple, TypeVar, Union
 
-from hayhooks import BasePipelineWrapper, get_last_user_message, streaming_generator
+from hayhooks import BasePipelineWrapper, async_streaming_generator, get_last_user_message, streaming_generator
 from hayhooks import log as logger
-from haystack import Pipeline, component
+from haystack import AsyncPipeline, Pipeline, component
 from haystack.dataclasses.chat_message import ChatMessage
 from haystack.dataclasses.streaming_chunk import StreamingChunk, select_streaming_callback
 from haystack.utils.auth import Secret
-from letta_client import Letta
+from letta_client import AsyncLetta, Letta
 from letta_client.types import MessageCreateParam
 from letta_client.types.agents import AssistantMessage, LettaResponse, LettaStreamingResponse, Message, ReasoningMessage, ToolCallMessage
 from letta_client.types.agents.letta_streaming_response import LettaUsageStatistics
 from letta_client.types.agents.text_content_param import TextContentParam
 from letta_client.types.tool_return_message import ToolReturnMessage
 
+ClientT = TypeVar("ClientT", Letta, AsyncLetta)
+
 
 @component
 class LettaChatGenerator:
@@ -47,6 +49,31 @@ class LettaChatGenerator:
         self.streaming_callback = streaming_callback
         self.timeout = 300.0
         self.max_retries = 3
+        # Created on first use and reused so chat requests share one HTTP connection pool
+        self._client: Optional[Letta] = None
+        self._async_client: Optional[AsyncLetta] = None
+
+    def _get_client(self) -> Letta:
+        if self._client is None:
+            api_key_value = None if self.api_key is None else self.api_key.resolve_value()
+            logger.info(f"Connecting to Letta at {self.base_url}")
+            # Only pass api_key if it's set, otherwise use placeholder
+            if api_key_value:
+                self._client = Letta(base_url=self.base_url, api_key=api_key_value, timeout=self.timeout, max_retries=self.max_retries, environment="local")
+            else:
+                # Letta client requires an api_key even for local development without auth
+                self._client = Letta(base_url=self.base_url, timeout=self.timeout, max_retries=self.max_retries, environment="local")
+        return self._client
+
+    def _get_async_client(self) -> AsyncLetta:
+        if self._async_client is None:
+            api_key_value = None if self.api_key is None else self.api_key.resolve_value()
+            logger.info(f"Connecting to Letta (async) at {self.base_url}")
+            if api_key_value:
+                self._async_client = AsyncLetta(base_url=self.base_url, api_key=api_key_value, timeout=self.timeout, max_retries=self.max_retries, environment="local")
+            else:
+                self._async_client = AsyncLetta(base_url=self.base_url, timeout=self.timeout, max_retries=self.max_retries, environment="local")
+        return self._async_client
 
     @component.output_types(replies=List[str], meta=List[Dict[str, Any]])
     def run(self, prompt: str, agent_id: str, streaming_callback: Optional[Callable[[StreamingChunk], None]] = None, **kwargs):
@@ -61,74 +88,130 @@ class LettaChatGenerator:
             A list of strings containing the generated responses and a list of dictionaries containing the metadata for each response.
         """
 
-        if kwargs:
-            logger.warning(f"Received unexpected kwargs: {kwargs}")
-
-        try:
-            api_key_value = None if self.api_key is None else self.api_key.resolve_value()
-            logger.info(f"Connecting to Letta at {self.base_url} with agent {agent_id}")
-            # Only pass api_key if it's set, otherwise use placeholder
-            if api_key_value:
-                client = Letta(base_url=self.base_url, api_key=api_key_value, timeout=self.timeout, max_retries=self.max_retries, environment="local")
-            else:
-                # Letta client requires an api_key even for local development without auth
-                client = Letta(base_url=self.base_url, timeout=self.timeout, max_retries=self.max_retries, environment="local")
-        except Exception as e:
-            logger.exception(f"Failed to create Letta client: {str(e)}", e)
-            raise ValueError(f"Failed to create Letta client: {str(e)}")
-
-        if not agent_id:
-            raise ValueError(f"No Letta agent ID available for {agent_id}!")
-
-        try:
-            message = self._message_from_user(prompt)
-            messages = [message]
-            logger.debug(f"Created message: {message}")
-        except Exception as e:
-            logger.exception(f"Failed to create message from prompt: {str(e)}", e)
-            raise ValueError(f"Failed to create message: {str(e)}")
+        client = self._connect(self._get_client)
+        messages = self._create_messages(prompt, agent_id, kwargs)
         streaming_callback = select_streaming_callback(self.streaming_callback, streaming_callback, requires_async=False)  # type: ignore[assignment]
 
         completions: List[ChatMessage] = []
         if streaming_callback is not None:
+            logger.info(f"Creating stream for agent_id: {agent_id}")
             try:
-                logger.info(f"Creating stream for agent_id: {agent_id}")
-                logger.debug(f"Messages: {messages}")
                 stream_completion: Iterator[LettaStreamingResponse] = client.agents.messages.create(agent_id=agent_id, messages=messages, streaming=True)
-
-                chunks = []
-                last_chunk = None
+            except Exception as e:
+                completions = [self._error_reply(f"Failed to create Letta stream for agent {agent_id}", "Failed to create stream", e)]
+            else:
+                chunks: List[StreamingChunk] = []
+                last_chunk: Optional[LettaStreamingResponse] = None
                 # Sometimes the response will time out while streaming, so we need a try / catch
                 try:
-                    for chunk in stream_completion:
-                        last_chunk = chunk
-
-                        chunk_delta: Optional[StreamingChunk] = self._process_streaming_chunk(chunk)
+                    for last_chunk in stream_completion:
+                        chunk_delta = self._collect_chunk(last_chunk, chunks)
                         if chunk_delta:
-                            chunks.append(chunk_delta)
                             streaming_callback(chunk_delta)
-
-                    assert last_chunk is not None
-                    completions = [self._create_message_from_chunks(agent_id, last_chunk, chunks)]
+                    completions = [self._streamed_reply(agent_id, last_chunk, chunks)]
                 except Exception as e:
-                    logger.exception(f"An error occurred while processing a streaming response: {str(e)}", e)
-                    completions = [ChatMessage.from_assistant(f"An error occurred while streaming response: {str(e)}")]
-            except Exception as e:
-                logger.exception(f"Failed to create Letta stream for agent {agent_id}: {str(e)}", e)
-                completions = [ChatMessage.from_assistant(f"Failed to create stream: {str(e)}")]
+                    completions = [self._error_reply("An error occurred while processing a streaming response", "An error occurred while streaming response", e)]
 
         else:
             try:
                 completion: LettaResponse = client.agents.messages.create(agent_id=agent_id, messages=messages, streaming=False)
                 completions = [self._build_message(agent_id, completion)]
             except Exception as e:
-                logger.exception(f"An error occurred while processing a response: {str(e)}", e)
-                completions = [ChatMessage.from_assistant(f"An error occurred while waiting for response: {str(e)}")]
+                completions = [self._error_reply("An error occurred while processing a response", "An error occurred while waiting for response", e)]
+
+        logger.debug("run: completions={}", completions)
+
+        return {"replies": completions}
+
+    @component.output_types(replies=List[str], meta=List[Dict[str, Any]])
+    async def run_async(self, prompt: str, agent_id: str, streaming_callback: Optional[Callable[[StreamingChunk], Any]] = None, **kwargs):
+        """
+        Send a query to Letta without blocking the event loop.
+        (Parameters and return are the same as the synchronous `run` method, except that the streaming callback must be async)
+        """
+
+        client = self._connect(self._get_async_client)
+        messages = self._create_messages(prompt, agent_id, kwargs)
+        streaming_callback = select_streaming_callback(self.streaming_callback, streaming_callback, requires_async=True)
+
+        completions: List[ChatMessage] = []
+        if streaming_callback is not None:
+            logger.info(f"Creating async stream for agent_id: {agent_id}")
+            try:
+                stream_completion: AsyncIterator[LettaStreamingResponse] = await client.agents.messages.create(agent_id=agent_id, messages=messages, streaming=True)
+            except Exception as e:
+                completions = [self._error_reply(f"Failed to create Letta stream for agent {agent_id}", "Failed to create stream", e)]
+            else:
+                chunks: List[StreamingChunk] = []
+                last_chunk: Optional[LettaStreamingResponse] = None
+                # Sometimes the response will time out while streaming, so we need a try / catch
+                try:
+                    async for last_chunk in stream_completion:
+                        chunk_delta = self._collect_chunk(last_chunk, chunks)
+                        if chunk_delta:
+                            await streaming_callback(chunk_delta)
+                    completions = [self._streamed_reply(agent_id, last_chunk, chunks)]
+                except Exception as e:
+                    completions = [self._error_reply("An error occurred while processing a streaming response", "An error occurred while streaming response", e)]
+
+        else:
+            try:
+                completion: LettaResponse = await client.agents.messages.create(agent_id=agent_id, messages=messages, streaming=False)
+                completions = [self._build_message(agent_id, completion)]
+            except Exception as e:
+                completions = [self._error_reply("An error occurred while processing a response", "An error occurred while waiting for response", e)]
 
-        logger.debug(f"run: completions={completions}")
+        logger.debug("run_async: completions={}", completions)
 
         return {"replies": completions}
 
+    @staticmethod
+    def _connect(get_client: Callable[[], ClientT]) -> ClientT:
+        """
+        Returns the client from the given getter, raising a ValueError if it can't be created.
+        """
+        try:
+            return get_client()
+        except Exception as e:
+            logger.exception(f"Failed to create Letta client: {str(e)}", e)
+            raise ValueError(f"Failed to create Letta client: {str(e)}")
+
+    def _create_messages(self, prompt: str, agent_id: str, kwargs: Dict[str, Any]) -> List[MessageCreateParam]:
+        """
+        Checks the arguments shared by `run` and `run_async` and turns the prompt into the messages sent to Letta.
+        """
+        if kwargs:
+            logger.warning(f"Received unexpected kwargs: {kwargs}")
+
+        if not agent_id:
+            raise ValueError(f"No Letta agent ID available for {agent_id}!")
+
+        try:
+            message = self._message_from_user(prompt)
+            logger.debug(f"Created message: {message}")
+        except Exception as e:
+            logger.exception(f"Failed to create message from prompt: {str(e)}", e)
+            raise ValueError(f"Failed to create message: {str(e)}")
+        return [message]
+
+    def _collect_chunk(self, chunk: LettaStreamingResponse, chunks: List[StreamingChunk]) -> Optional[StreamingChunk]:
+        """
+        Converts a chunk from the Letta stream, keeping it in `chunks` so the reply can be built once the stream ends.
+        """
+        chunk_delta = self._process_streaming_chunk(chunk)
+        if chunk_delta:
+            chunks.append(chunk_delta)
+        return chunk_delta
+
+    def _streamed_reply(self, agent_id: str, last_chunk: Optional[LettaStreamingResponse], chunks: List[StreamingChunk]) -> ChatMessage:
+        assert last_chunk is not None
+        return self._create_message_from_chunks(agent_id, last_chunk, chunks)
+
+    @staticmethod
+    def _error_reply(log_message: str, reply_message: str, e: Exception) -> ChatMessage:
+        logger.exception(f"{log_message}: {str(e)}", e)
+        return ChatMessage.from_assistant(f"{reply_message}: {str(e)}")
+
     @staticmethod
     def _message_from_user(prompt: str) -> MessageCreateParam:
         return MessageCreateParam(role="user", content=[TextContentParam(text=prompt, type="text")])
@@ -137,7 +220,7 @@ class LettaChatGenerator:
         """
         Creates a single ChatMessage from the streamed chunks. Some data is retrieved from the completion chunk.
         """
-        logger.debug(f"_create_message_from_chunks: completion_chunk={completion_chunk}, streamed_chunks={streamed_chunks}")
+        logger.debug("_create_message_from_chunks: completion_chunk={}, streamed_chunks={}", completion_chunk, streamed_chunks)
 
         # "".join([chunk.content for chunk in streamed_chunks])
         complete_response = ChatMessage.from_assistant("")
@@ -168,7 +251,8 @@ class LettaChatGenerator:
         """
         Process a streaming chunk based on its type and invoke the streaming callback.
         """
-        logger.debug(f"Processing streaming chunk: {chunk}")
+        # Called once per streamed token, so let loguru skip formatting when DEBUG is off
+        logger.debug("Processing streaming chunk: {}", chunk)
 
         if isinstance(chunk, ReasoningMessage):
             reasoning_chunk: ReasoningMessage = chunk
@@ -188,9 +272,9 @@ class LettaChatGenerator:
             arguments: str = tool_call_message.tool_call.arguments if tool_call_message.tool_call.arguments else ""
 
             # DEBUG: Log raw arguments to investigate HTML entity issue
-            logger.debug(f"RAW tool call arguments from Letta: {repr(arguments)}")
-            logger.debug(f"Arguments contain &quot;: {'&quot;' in arguments}")
-            logger.debug(f"Arguments contain &amp;: {'&amp;' in arguments}")
+            logger.debug("RAW tool call arguments from Letta: {!r}", arguments)
+            logger.debug("Arguments contain &quot;: {}", "&quot;" in arguments)
+            logger.debug("Arguments contain &amp;: {}", "&amp;" in arguments)
 
             no_heartbeat_requested = """"request_heartbeat": false""" in arguments
             if no_heartbeat_requested:
@@ -211,7 +295,7 @@ class LettaChatGenerator:
             now = datetime.now()
             meta_dict = {"type": "assistant", "received_at": now.isoformat()}
 
-            logger.debug(f"Found assistant message: {chunk}")
+            logger.debug("Found assistant message: {}", chunk)
 
             # chunk.content can be a string or a list of content objects
             if isinstance(chunk.content, str):
@@ -223,14 +307,14 @@ class LettaChatGenerator:
             else:
                 content = ""
 
-            logger.debug(f"Returning assistant content: {content}")
+            logger.debug("Returning assistant content: {}", content)
 
             return StreamingChunk(content=content, meta=meta_dict)
         elif isinstance(chunk, LettaUsageStatistics):
-            logger.debug(f"Ignoring usage statistics: {chunk}")
+            logger.debug("Ignoring usage statistics: {}", chunk)
             return None
         else:
-            logger.debug(f"Ignoring unknown streaming chunk type: {type(chunk)}")
+            logger.debug("Ignoring unknown streaming chunk type: {}", type(chunk))
             return None
 
     def _build_message(self, agent_id: str, response: LettaResponse):
@@ -242,7 +326,7 @@ class LettaChatGenerator:
         :returns:
             The ChatMessage.
         """
-        logger.debug(f"_build_message: response={response}")
+        logger.debug("_build_message: response={}", response)
 
         messages: List[Message] = response.messages
         usage = response.usage
@@ -274,6 +358,28 @@ class LettaChatGenerator:
         return chat_message
 
 
+# Markdown headers written when the stream switches to a new kind of chunk. Tool returns carry on from their tool call.
+SECTION_HEADERS = {
+    "reasoning": "\n\n**Agent Thoughts:**\n",
+    "tool_call": "\n\n**Tool Calls:**\n",
+    "assistant": "\n\n**Assistant Response:**\n",
+}
+
+
+def _with_section_header(chunk: Any, current_section: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Returns the text to stream for a chunk, starting with a section header when the chunk switches to a new type, and the section it leaves the stream in.
+    """
+    if not isinstance(chunk, StreamingChunk):
+        # Fallback for any other type (shouldn't happen, but be safe)
+        return str(chunk), current_section
+
+    chunk_type = chunk.meta.get("type", "unknown")
+    if chunk_type == current_section:
+        return chunk.content, current_section
+    return SECTION_HEADERS.get(chunk_type, "") + chunk.content, chunk_type
+
+
 class PipelineWrapper(BasePipelineWrapper):
     skip_mcp = True
 
@@ -283,15 +389,18 @@ class PipelineWrapper(BasePipelineWrapper):
         letta_chat_generator = LettaChatGenerator()
         self.pipeline.add_component("llm", letta_chat_generator)
 
+        # Chat completions stream through the async pipeline, so they don't hold a threadpool worker per request.
+        # Haystack won't add one component instance to two pipelines, so this one gets its own generator.  Clients are
+        # created on first use, so the sync generator only ever opens a Letta pool and this one only an AsyncLetta pool.
+        self.async_pipeline = AsyncPipeline()
+        self.async_pipeline.add_component("llm", LettaChatGenerator())
+
     def run_api(self, prompt: str, agent_id: str) -> str:
         result = self.pipeline.run({"llm": {"prompt": prompt, "agent_id": agent_id}})
         return result["llm"]["replies"][0]
 
-    def run_chat_completion(self, model: str, messages: List[dict], body: dict) -> Union[str, Generator]:
-        # The body argument contains the full request body, which may be used to extract more
-        # information like the temperature or the max_tokens (see the OpenAI API reference for more information).
-        logger.debug(f"Running pipeline with model: {model}, messages: {messages}, body keys: {list(body.keys())}")
-
+    @staticmethod
+    def _agent_id_from_body(body: dict) -> str:
         # Filter out OpenAI-specific parameters that might conflict with Letta
         filtered_body = {}
         for key, value in body.items():
@@ -305,12 +414,20 @@ class PipelineWrapper(BasePipelineWrapper):
             agent_id = filtered_body.get("agent_id")
             if not agent_id:
                 raise ValueError("No agent_id provided in the request body")
+        return agent_id
+
+    def run_chat_completion(self, model: str, messages: List[dict], body: dict) -> Union[str, Generator]:
+        # The body argument contains the full request body, which may be used to extract more
+        # information like the temperature or the max_tokens (see the OpenAI API reference for more information).
+        logger.debug("Running pipeline with model: {}, messages: {}, body keys: {}", model, messages, list(body))
+
+        agent_id = self._agent_id_from_body(body)
         prompt = get_last_user_message(messages)
 
         # streaming_generator yields StreamingChunk objects, but hayhooks expects strings
         # We need to extract the content from each chunk and add headers
         def content_generator() -> Generator[str, None, None]:
-            current_section = None
+            current_section: Optional[str] = None
             for chunk in streaming_generator(
                 pipeline=self.pipeline,
                 pipeline_run_args={
@@ -320,26 +437,30 @@ class PipelineWrapper(BasePipelineWrapper):
                     }
                 },
             ):
-                # Extract content from StreamingChunk objects
-                if isinstance(chunk, StreamingChunk):
-                    chunk_type = chunk.meta.get("type", "unknown")
-
-                    # Add section header when switching to a new type
-                    if chunk_type != current_section:
-                        if chunk_type == "reasoning":
-                            yield "\n\n**Agent Thoughts:**\n"
-                        elif chunk_type == "tool_call":
-                            yield "\n\n**Tool Calls:**\n"
-                        elif chunk_type == "tool_return":
-                            # Don't add header for tool returns, they're part of tool calls
-                            pass
-                        elif chunk_type == "assistant":
-                            yield "\n\n**Assistant Response:**\n"
-                        current_section = chunk_type
-
-                    yield chunk.content
-                else:
-                    # Fallback for any other type (shouldn't happen, but be safe)
-                    yield str(chunk)
+                text, current_section = _with_section_header(chunk, current_section)
+                yield text
+
+        return content_generator()
+
+    async def run_chat_completion_async(self, model: str, messages: List[dict], body: dict) -> Union[str, AsyncGenerator]:
+        logger.debug("Running async pipeline with model: {}, messages: {}, body keys: {}", model, messages, list(body))
+
+        # Resolve the agent before streaming starts, so a bad request fails with an error instead of an empty stream
+        agent_id = self._agent_id_from_body(body)
+        prompt = get_last_user_message(messages)
+
+        async def content_generator() -> AsyncGenerator[str, None]:
+            current_section: Optional[str] = None
+            async for chunk in async_streaming_generator(
+                pipeline=self.async_pipeline,
+                pipeline_run_args={
+                    "llm": {
+                        "prompt": prompt,
+                        "agent_id": agent_id,
+                    }
+                },
+            ):
+                text, current_section = _with_section_header(chunk, current_section)
+                yield text
 
         return content_generator()
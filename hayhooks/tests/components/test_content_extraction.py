@@ -1,11 +1,14 @@
 """Test content extraction."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 from haystack import Document, Pipeline, tracing
+from haystack.components.converters import HTMLToDocument, MarkdownToDocument, TextFileToDocument
 from haystack.dataclasses import ByteStream
 from haystack.tracing.logging_tracer import LoggingTracer
 
-from components.content_extraction import JoinWithContent, build_content_extraction_component
-from components.fetchers import ContentFetcherResolver, ScraplingLinkContentFetcher
+from components.content_extraction import JoinWithContent, MimeTypeConverter, PdfiumToDocument, URLContentRouter, build_content_extraction_component, build_url_resolvers
+from components.fetchers import ContentFetcherResolver, HaystackLinkContentFetcher, ScraplingLinkContentFetcher
 
 
 def test_build_content_extraction_component():
@@ -17,6 +20,19 @@ def test_build_content_extraction_component():
     assert "extractor" in pipe.graph.nodes
 
 
+def test_build_content_extraction_component_shares_resolvers():
+    """Test that each build gets its own SuperComponent but reuses the resolvers."""
+    first = build_content_extraction_component(raise_on_failure=False)
+    second = build_content_extraction_component(raise_on_failure=False)
+    assert first is not second
+
+    # Both can be added to separate pipelines
+    Pipeline().add_component("extractor", first)
+    Pipeline().add_component("extractor", second)
+
+    assert build_url_resolvers(raise_on_failure=False, timeout=3) is build_url_resolvers(raise_on_failure=False, timeout=3)
+
+
 def test_content_extraction_component_run():
     """Test that we can run the extractor and get content."""
     extraction_component = build_content_extraction_component(http2=True, raise_on_failure=False)
@@ -322,3 +338,270 @@ def test_content_extraction_with_all_failed_urls():
     # Should have at least one empty document (from the placeholder stream)
     # The exact behavior depends on how document converters handle empty streams
     assert len(result["documents"]) >= 0  # May be 0 or have placeholder docs
+
+
+def test_mime_type_converter_dispatches_by_mime_type():
+    """Test that streams go to the converter for their MIME type, ignoring Content-Type parameters."""
+    converter = MimeTypeConverter(
+        converters={"text/plain": TextFileToDocument(), "text/html": HTMLToDocument()},
+        fallback_converter=TextFileToDocument(),
+    )
+    sources = [
+        ByteStream(data=b"plain text", meta={"url": "https://example.com/a.txt"}, mime_type="text/plain"),
+        ByteStream(data=b"<html><body><p>Some html content for the page</p></body></html>", meta={"url": "https://example.com/b"}, mime_type="text/html; charset=utf-8"),
+        ByteStream(data=b"unknown text", meta={"url": "https://example.com/c"}, mime_type="application/x-unknown"),
+    ]
+
+    result = converter.run(sources=sources)
+
+    contents = {doc.meta["url"]: doc.content for doc in result["documents"]}
+    assert contents["https://example.com/a.txt"] == "plain text"
+    assert "Some html content" in contents["https://example.com/b"]
+    assert "<p>" not in contents["https://example.com/b"]
+    assert contents["https://example.com/c"] == "unknown text"
+
+
+def test_url_content_router_only_asks_resolvers_for_their_domains():
+    """Test that resolvers declaring domains are only asked about URLs on those hosts."""
+
+    class DomainResolver:
+        domains = ("github.com",)
+
+        def __init__(self):
+            self.asked = []
+
+        def can_handle(self, url):
+            self.asked.append(url)
+            return "/issues/" in url
+
+    class GenericResolver:
+        def can_handle(self, url):
+            return True
+
+    domain_resolver = DomainResolver()
+    generic_resolver = GenericResolver()
+    router = URLContentRouter(resolvers=[domain_resolver, generic_resolver])
+
+    assert router._find_resolver("https://github.com/a/b/issues/1") is domain_resolver
+    assert router._find_resolver("https://www.github.com/a/b/issues/2") is domain_resolver
+    assert router._find_resolver("https://github.com/a/b") is generic_resolver
+    assert router._find_resolver("https://example.com/github.com/a/b/issues/3") is generic_resolver
+    assert domain_resolver.asked == ["https://github.com/a/b/issues/1", "https://www.github.com/a/b/issues/2", "https://github.com/a/b"]
+
+
+def test_url_content_router_fetches_duplicate_urls_once():
+    """Test that a URL repeated in the input is only fetched once."""
+
+    class RecordingResolver:
+        def __init__(self):
+            self.fetched = []
+
+        def can_handle(self, url):
+            return True
+
+        def run(self, urls):
+            self.fetched.extend(urls)
+            return {"streams": [ByteStream(data=b"content", meta={"url": url}, mime_type="text/plain") for url in urls]}
+
+    resolver = RecordingResolver()
+    router = URLContentRouter(resolvers=[resolver])
+
+    result = router.run(urls=["https://example.com/a", "https://example.com/b", "https://example.com/a"])
+
+    assert resolver.fetched == ["https://example.com/a", "https://example.com/b"]
+    assert [stream.meta["url"] for stream in result["streams"]] == ["https://example.com/a", "https://example.com/b"]
+
+
+def test_mime_type_converter_skips_cleaner_for_uncleaned_mime_types():
+    """Test that the cleaner only runs on documents from converters not marked as already clean."""
+
+    class UpperCaseCleaner:
+        def run(self, documents):
+            return {"documents": [Document(content=doc.content.upper(), meta=doc.meta) for doc in documents]}
+
+    converter = MimeTypeConverter(
+        converters={"text/plain": TextFileToDocument(), "text/html": HTMLToDocument()},
+        fallback_converter=TextFileToDocument(),
+        cleaner=UpperCaseCleaner(),
+        uncleaned_mime_types=["text/plain"],
+    )
+    sources = [
+        ByteStream(data=b"plain text", meta={"url": "https://example.com/a.txt"}, mime_type="text/plain"),
+        ByteStream(data=b"<html><body><p>Some html content for the page</p></body></html>", meta={"url": "https://example.com/b"}, mime_type="text/html"),
+    ]
+
+    result = converter.run(sources=sources)
+
+    contents = {doc.meta["url"]: doc.content for doc in result["documents"]}
+    assert contents["https://example.com/a.txt"] == "plain text"
+    assert "SOME HTML CONTENT" in contents["https://example.com/b"]
+
+
+def test_mime_type_converter_sniffs_mislabeled_content():
+    """Test that PDFs and HTML served with a generic or wrong Content-Type go to the right converter."""
+
+    class RecordingConverter:
+        def __init__(self):
+            self.urls = []
+
+        def run(self, sources):
+            self.urls.extend(source.meta["url"] for source in sources)
+            return {"documents": []}
+
+    pdf_converter = RecordingConverter()
+    html_converter = RecordingConverter()
+    fallback_converter = RecordingConverter()
+    converter = MimeTypeConverter(
+        converters={"application/pdf": pdf_converter, "text/html": html_converter},
+        fallback_converter=fallback_converter,
+    )
+    sources = [
+        ByteStream(data=b"%PDF-1.7 ...", meta={"url": "https://example.com/a"}, mime_type="application/octet-stream"),
+        ByteStream(data=b"%PDF-1.4 ...", meta={"url": "https://example.com/b"}, mime_type="text/html"),
+        ByteStream(data=b"\n  <!DOCTYPE html><html></html>", meta={"url": "https://example.com/c"}, mime_type=None),
+        ByteStream(data=b"just some text", meta={"url": "https://example.com/d"}, mime_type="application/octet-stream"),
+    ]
+
+    converter.run(sources=sources)
+
+    assert sorted(pdf_converter.urls) == ["https://example.com/a", "https://example.com/b"]
+    assert html_converter.urls == ["https://example.com/c"]
+    assert fallback_converter.urls == ["https://example.com/d"]
+
+
+def _pdf_with_pages(*texts):
+    """Builds a minimal PDF with one line of text on each page."""
+    page_ids = [4 + 2 * i for i in range(len(texts))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % page_id for page_id in page_ids) + b"] /Count %d >>" % len(texts),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, text in zip(page_ids, texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def test_pdfium_to_document_separates_pages_with_form_feeds():
+    """Test that PdfiumToDocument extracts each page's text, with form feeds between pages like PyPDFToDocument."""
+    source = ByteStream(data=_pdf_with_pages("First page", "Second page"), meta={"url": "https://example.com/a.pdf"}, mime_type="application/pdf")
+
+    result = PdfiumToDocument().run(sources=[source])
+
+    assert [doc.content for doc in result["documents"]] == ["First page\fSecond page"]
+    assert result["documents"][0].meta["url"] == "https://example.com/a.pdf"
+
+
+def test_mime_type_converter_keeps_order_of_split_groups():
+    """Test that a large group split across workers comes back complete and in input order, and unsplittable groups are converted in one call."""
+
+    class RecordingConverter:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, sources):
+            self.calls.append([source.meta["url"] for source in sources])
+            return {"documents": [Document(content="pdf", meta=source.meta) for source in sources]}
+
+    pdf_converter = RecordingConverter()
+    converter = MimeTypeConverter(
+        converters={"text/plain": TextFileToDocument(), "application/pdf": pdf_converter},
+        fallback_converter=TextFileToDocument(),
+        split_mime_types=["text/plain"],
+    )
+    text_sources = [ByteStream(data=f"text {i}".encode(), meta={"url": f"https://example.com/{i}.txt"}, mime_type="text/plain") for i in range(100)]
+    pdf_sources = [ByteStream(data=b"%PDF-1.7 ...", meta={"url": f"https://example.com/{i}.pdf"}, mime_type="application/pdf") for i in range(10)]
+
+    result = converter.run(sources=text_sources + pdf_sources)
+
+    text_documents = [doc for doc in result["documents"] if doc.meta["url"].endswith(".txt")]
+    assert [doc.content for doc in text_documents] == [f"text {i}" for i in range(100)]
+    assert pdf_converter.calls == [[source.meta["url"] for source in pdf_sources]]
+
+
+def _convert_one(converter, source):
+    return converter.run(sources=[source])["documents"][0].content
+
+
+def test_split_converters_are_thread_safe():
+    """Test that one HTMLToDocument and one MarkdownToDocument instance convert correctly when run from many threads at once, as MimeTypeConverter does for split groups."""
+    html_sources = [
+        ByteStream(
+            data=f"<html><body><article><h1>Title {i}</h1><p>Paragraph {i} of the article, with enough text for the extractor to keep it.</p></article></body></html>".encode(), meta={"url": f"https://example.com/{i}.html"}, mime_type="text/html"
+        )
+        for i in range(32)
+    ]
+    markdown_sources = [ByteStream(data=f"# Title {i}\n\nParagraph {i} with a [link](https://example.com/{i}) and `code`.".encode(), meta={"url": f"https://example.com/{i}.md"}, mime_type="text/markdown") for i in range(32)]
+
+    for converter, sources in [(HTMLToDocument(extraction_kwargs={"fast": True}), html_sources), (MarkdownToDocument(progress_bar=False), markdown_sources)]:
+        expected = [_convert_one(converter, source) for source in sources]
+        assert all(f"Paragraph {i}" in content for i, content in enumerate(expected))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(_convert_one, [converter] * len(sources) * 4, sources * 4))
+
+        assert results == expected * 4
+
+
+def test_content_fetcher_resolver_matches_redirected_streams_to_requested_urls():
+    """Test that streams whose meta URL a fetcher rewrote, e.g. after a redirect, still count as fetched for the requested URL."""
+
+    class RedirectingFetcher:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, urls):
+            self.calls.append(urls)
+            return {"streams": [ByteStream(data=b"content", meta={"url": f"{url}/final"}, mime_type="text/plain") for url in urls]}
+
+    primary = RedirectingFetcher()
+    fallback = RedirectingFetcher()
+    resolver = ContentFetcherResolver(
+        fetcher_configs=[{"name": "primary", "patterns": ["*"], "priority": 1}, {"name": "fallback", "patterns": ["*"], "priority": 2}],
+        default_fetcher="primary",
+    )
+    resolver.fetchers = {"primary": primary, "fallback": fallback}
+
+    for urls in (["https://example.com/a"], ["https://example.com/a", "https://example.com/b"]):
+        result = resolver.run(urls=urls)
+
+        assert [stream.meta["url"] for stream in result["streams"]] == urls
+        assert [stream.meta["final_url"] for stream in result["streams"]] == [f"{url}/final" for url in urls]
+    assert fallback.calls == []
+
+
+def test_haystack_link_content_fetcher_limits_each_host_per_batch():
+    """Test that URLs are fetched in batches with at most max_per_host URLs from one host, each batch passed to a single LinkContentFetcher run."""
+
+    class RecordingFetcher:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, urls):
+            self.calls.append(urls)
+            return {"streams": [ByteStream(data=b"content", meta={"url": url}) for url in urls]}
+
+    fetcher = HaystackLinkContentFetcher(max_workers=4, max_per_host=2, cache_ttl=0)
+    fetcher.primary_fetcher = RecordingFetcher()
+    urls = [f"https://a.example.com/{i}" for i in range(5)] + ["https://b.example.com/0"]
+
+    result = fetcher.run(urls=urls)
+
+    assert sorted(stream.meta["url"] for stream in result["streams"]) == sorted(urls)
+    assert fetcher.primary_fetcher.calls == [
+        ["https://a.example.com/0", "https://a.example.com/1", "https://b.example.com/0"],
+        ["https://a.example.com/2", "https://a.example.com/3"],
+        ["https://a.example.com/4"],
+    ]
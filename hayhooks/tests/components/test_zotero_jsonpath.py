@@ -198,3 +198,84 @@ def test_search_combining_operators(zotero_db):
     results = zotero_db.find_items_by_mongo_query([{"title": {"$regex": "Another.*"}}, {"DOI": "10.1234/test3"}])
     assert len(results) == 1
     assert results[0]["key"] == "item3"
+
+
+class FakeZoteroClient:
+    """Stands in for the pyzotero client, returning a fixed set of changed items."""
+
+    def __init__(self, items, version):
+        self._items = items
+        self._version = version
+        self.pages_requested = 0
+
+    def items(self, limit=100, start=0, **kwargs):
+        self.pages_requested += 1
+        return self._items[start : start + limit]
+
+    def top(self, limit=100, start=0, **kwargs):
+        return self.items(limit=limit, start=start)
+
+    def last_modified_version(self):
+        return self._version
+
+
+def test_sync_invalidates_cached_url_search(zotero_db):
+    url = "https://example.com/paper4"
+    assert zotero_db.search_json_by_url_sqlite(url) == []
+
+    item = {"key": "item4", "data": {"dateModified": "2023-01-04", "itemType": "journalArticle", "title": "New Paper", "url": url}}
+    zotero_db.sync_zotero_to_json_sqlite(FakeZoteroClient([item], version=2))
+
+    results = zotero_db.search_json_by_url_sqlite(url)
+    assert [result["key"] for result in results] == ["item4"]
+
+
+def test_search_by_urls_returns_matches_per_url(zotero_db):
+    paper4, paper5, missing = "https://example.com/paper4", "https://example.com/paper5", "https://example.com/missing"
+    items = [
+        {"key": "item4", "data": {"dateModified": "2023-01-04", "itemType": "journalArticle", "url": paper4}},
+        {"key": "item5", "data": {"dateModified": "2023-01-05", "itemType": "journalArticle", "url": paper5}},
+        {"key": "item6", "data": {"dateModified": "2023-01-06", "itemType": "attachment", "url": paper5}},
+    ]
+    zotero_db.sync_zotero_to_json_sqlite(FakeZoteroClient(items, version=2))
+
+    results = zotero_db.search_json_by_urls_sqlite([paper4, paper5, missing])
+    assert {url: [item["key"] for item in matches] for url, matches in results.items()} == {paper4: ["item4"], paper5: ["item5"], missing: []}
+
+
+def test_search_matches_canonical_url_and_doi(zotero_db):
+    item = {"key": "item4", "data": {"dateModified": "2023-01-04", "itemType": "journalArticle", "url": "https://www.example.com/paper4/", "DOI": "10.1234/TEST4"}}
+    zotero_db.sync_zotero_to_json_sqlite(FakeZoteroClient([item], version=2))
+
+    assert [result["key"] for result in zotero_db.search_json_by_url_sqlite("http://example.com/paper4#abstract")] == ["item4"]
+    assert [result["key"] for result in zotero_db.search_json_by_doi_sqlite("10.1234/test4")] == ["item4"]
+    assert zotero_db.search_json_by_url_sqlite("https://example.com/paper4?page=2") == []
+
+
+def test_sync_pages_through_large_libraries(zotero_db):
+    items = [{"key": f"item{i}", "data": {"dateModified": "2023-02-01", "itemType": "journalArticle", "url": f"https://example.com/bulk/{i}"}} for i in range(1234)]
+    client = FakeZoteroClient(items, version=2)
+
+    assert zotero_db.sync_zotero_to_json_sqlite(client) == 1234
+    assert client.pages_requested == 13
+    assert [result["key"] for result in zotero_db.search_json_by_url_sqlite("https://example.com/bulk/1233")] == ["item1233"]
+
+
+def test_cached_search_results_are_not_shared(zotero_db):
+    url = "https://example.com/paper4"
+    item = {"key": "item4", "data": {"dateModified": "2023-01-04", "itemType": "journalArticle", "title": "New Paper", "url": url}}
+    zotero_db.sync_zotero_to_json_sqlite(FakeZoteroClient([item], version=2))
+
+    zotero_db.search_json_by_url_sqlite(url)[0]["data"]["title"] = "Changed"
+
+    assert zotero_db.search_json_by_url_sqlite(url)[0]["data"]["title"] == "New Paper"
+
+
+def test_searches_return_no_matches_when_database_failed_to_open():
+    # The parent directory doesn't exist, so init_json_db can't open the database
+    db = ZoteroDatabase(db_file=os.path.join(tempfile.mkdtemp(), "missing", "zotero.db"))
+
+    assert db.search_json_by_url_sqlite("https://example.com/paper1") == []
+    assert db.search_json_by_dois_sqlite(["10.1234/test.123"]) == {}
+    assert db.find_items_by_mongo_query({"title": "Test Paper"}) == []
+    assert db.sync_zotero_to_json_sqlite(FakeZoteroClient([], version=1)) == 0